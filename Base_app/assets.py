@@ -0,0 +1,214 @@
+"""
+Static and media file serving for production.
+
+AssetMiddleware answers requests under ``STATIC_URL`` (from ``STATIC_ROOT``,
+filled by ``collectstatic``) and ``MEDIA_URL`` (from ``MEDIA_ROOT``) before the
+session and auth middleware run. Static files whose names carry a content hash
+are sent with a one-year ``immutable`` Cache-Control; everything else,
+including every upload, is revalidated with its ETag. Precompressed
+``.br``/``.gz`` siblings written by Base_app.storage are picked by
+``Accept-Encoding`` and get an ETag of their own, and single byte ranges are
+answered with 206.
+
+Responses are FileResponses over the open file, so gunicorn hands them to
+``wsgi.file_wrapper`` and sends the bytes with ``os.sendfile``.
+"""
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponse, HttpResponseNotAllowed, HttpResponseNotFound
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+MUTABLE_CACHE_CONTROL = 'public, max-age=0, must-revalidate'
+
+# ManifestStaticFilesStorage names ("app.3f2a9c0b1d4e.css") embed a content
+# hash. Uploaded names are chosen by users and may look hashed too, so this is
+# only applied under STATIC_URL.
+HASHED_NAME = re.compile(r'(?:^|[.-])[0-9a-f]{12,}(?=[.-])')
+
+# Preferred first
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeFile:
+    """
+    File positioned at ``start`` that reads at most ``length`` bytes. It
+    exposes ``fileno()`` so the WSGI server can still sendfile the range.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def is_immutable(path):
+    return bool(HASHED_NAME.search(os.path.basename(path)))
+
+
+def file_etag(st, encoding=None):
+    """Strong ETag of a file, distinct for each content coding it is sent in"""
+    if encoding:
+        return f'"{st.st_mtime_ns:x}-{st.st_size:x}-{encoding}"'
+    return f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+
+def accepted_encodings(request):
+    header = request.headers.get('Accept-Encoding', '')
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def parse_range(header, size):
+    """
+    Return ``(start, end)`` of a single ``bytes=`` range, ``None`` to send the
+    whole file, or ``False`` if the range cannot be satisfied.
+    """
+    match = RANGE.match(header.replace(' ', ''))
+    if not match or not any(match.groups()):
+        # Multiple or malformed ranges: serving the whole file is allowed
+        return None
+    first, last = match.groups()
+    if not first:
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def not_modified(request, etag, mtime):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        return if_none_match.strip() == '*' or etag in [tag.strip() for tag in if_none_match.split(',')]
+    since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return since is not None and int(mtime) <= since
+
+
+def serve_file(request, root, path, hashed_names=False):
+    """
+    Serve ``path`` below ``root`` with caching, compression and ranges.
+    ``hashed_names`` marks files named by content hash as immutable.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    try:
+        full_path = safe_join(root, path)
+        st = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError, ValueError):
+        return HttpResponseNotFound()
+    if not stat.S_ISREG(st.st_mode):
+        return HttpResponseNotFound()
+
+    send_path, size, status, encoding = full_path, st.st_size, 200, None
+    byte_range = None
+    range_header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    # Ranges are always taken from the identity file
+    if range_header and (if_range is None or if_range.strip() == file_etag(st)):
+        byte_range = parse_range(range_header, size)
+
+    if byte_range is None:
+        accepted = accepted_encodings(request)
+        for coding, suffix in ENCODINGS:
+            if coding not in accepted:
+                continue
+            try:
+                compressed = os.stat(full_path + suffix)
+            except OSError:
+                continue
+            if compressed.st_mtime_ns >= st.st_mtime_ns:
+                send_path, size, encoding = full_path + suffix, compressed.st_size, coding
+                break
+
+    etag = file_etag(st, encoding)
+    content_type, _ = mimetypes.guess_type(full_path)
+    immutable = hashed_names and is_immutable(path)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(st.st_mtime),
+        'Cache-Control': IMMUTABLE_CACHE_CONTROL if immutable else MUTABLE_CACHE_CONTROL,
+        'Vary': 'Accept-Encoding',
+        'Accept-Ranges': 'bytes',
+    }
+    if not_modified(request, etag, st.st_mtime):
+        response = HttpResponse(status=304)
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    if byte_range is not None:
+        start, end = byte_range
+        size, status = end - start + 1, 206
+        headers['Content-Range'] = f'bytes {start}-{end}/{st.st_size}'
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    content_type = content_type or 'application/octet-stream'
+
+    if request.method == 'HEAD':
+        response = HttpResponse(status=status, content_type=content_type)
+    else:
+        file = open(send_path, 'rb')
+        if byte_range is not None:
+            file = RangeFile(file, byte_range[0], size)
+        response = FileResponse(
+            file, status=status, content_type=content_type, filename=os.path.basename(full_path),
+        )
+    for name, value in headers.items():
+        response[name] = value
+    response['Content-Length'] = size
+    return response
+
+
+class AssetMiddleware:
+    """Serve ``STATIC_URL`` and ``MEDIA_URL`` without running the view stack"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.roots = []
+        # runserver's staticfiles handler serves STATICFILES_DIRS in DEBUG
+        if getattr(settings, 'SERVE_STATIC', not settings.DEBUG) and settings.STATIC_ROOT:
+            self.roots.append((settings.STATIC_URL, str(settings.STATIC_ROOT), True))
+        if getattr(settings, 'SERVE_MEDIA', True) and settings.MEDIA_ROOT:
+            self.roots.append((settings.MEDIA_URL, str(settings.MEDIA_ROOT), False))
+
+    def __call__(self, request):
+        for prefix, root, hashed_names in self.roots:
+            if request.path_info.startswith(prefix):
+                return serve_file(request, root, request.path_info[len(prefix):], hashed_names)
+        return self.get_response(request)
@@ -0,0 +1,184 @@
+"""
+Order and transaction numbers.
+
+Numbers are 64-bit, time-ordered ids written as 13 Crockford base32
+characters after a prefix, e.g. ``ORD-02XJV792W0000``:
+
+    42 bits  milliseconds since ID_EPOCH_MS (good until ~2165)
+    10 bits  worker block: ID_HOST (3 bits) and a per-host slot (7 bits)
+    12 bits  sequence within the millisecond
+
+Each worker process claims a slot of its own by taking an exclusive ``flock``
+on one of ``ID_LOCK_DIR/slot-N.lock``. The kernel drops the lock when the
+process dies, so slots are reused without bookkeeping, and two live workers on
+a host can never share one. Hosts are told apart by the ``ID_HOST`` setting.
+Within a worker, ids strictly increase: a clock that steps backwards is
+ignored and a full millisecond borrows the next one. Fixed-width base32 keeps
+string order equal to numeric order, so new rows append at the right edge of
+the ``unique`` index.
+
+The generator class is pluggable through the ``ID_GENERATOR`` setting; any
+class with a ``next_id(prefix)`` method will do.
+"""
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+WIDTH = 13
+
+TIME_BITS = 42
+HOST_BITS = 3
+SLOT_BITS = 7
+SEQUENCE_BITS = 12
+WORKER_BITS = HOST_BITS + SLOT_BITS
+
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+SLOTS = 1 << SLOT_BITS
+
+# 2026-01-01T00:00:00Z
+ID_EPOCH_MS = 1767225600000
+
+
+def encode(number):
+    """Write a 64-bit number as fixed-width Crockford base32"""
+    chars = []
+    for _ in range(WIDTH):
+        number, digit = divmod(number, 32)
+        chars.append(ALPHABET[digit])
+    return ''.join(reversed(chars))
+
+
+def decode(text):
+    """Read an id back into its number, ignoring any prefix"""
+    number = 0
+    for char in text[-WIDTH:].upper():
+        number = number * 32 + ALPHABET.index(char)
+    return number
+
+
+def parts(number):
+    """Split a number into ``(milliseconds since epoch, worker, sequence)``"""
+    return (
+        number >> (WORKER_BITS + SEQUENCE_BITS),
+        (number >> SEQUENCE_BITS) & ((1 << WORKER_BITS) - 1),
+        number & MAX_SEQUENCE,
+    )
+
+
+class SlotUnavailable(RuntimeError):
+    """Raised when every worker slot of this host is taken"""
+
+
+class SlotLock:
+    """An exclusive lock on one worker slot, held for the life of the process"""
+
+    def __init__(self, lock_dir):
+        self.lock_dir = lock_dir
+        self.file = None
+        self.slot = self._claim()
+
+    def _claim(self):
+        if fcntl is None:
+            # No flock: fall back to the pid, which spreads workers over the
+            # slots but cannot guarantee two of them never share one
+            return os.getpid() % SLOTS
+        os.makedirs(self.lock_dir, exist_ok=True)
+        for slot in range(SLOTS):
+            lock_file = open(os.path.join(self.lock_dir, f'slot-{slot}.lock'), 'a')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                continue
+            self.file = lock_file
+            return slot
+        raise SlotUnavailable(f'All {SLOTS} id slots in {self.lock_dir} are held')
+
+    def release(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class TimeOrderedIdGenerator:
+    """Thread-safe generator of time-ordered ids for one worker process"""
+
+    def __init__(self, host=None, lock_dir=None, clock=time.time_ns):
+        self.host = settings.ID_HOST if host is None else host
+        if not 0 <= self.host < 1 << HOST_BITS:
+            raise ValueError(f'ID_HOST must be between 0 and {(1 << HOST_BITS) - 1}')
+        self.lock_dir = lock_dir or settings.ID_LOCK_DIR
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.slot_lock = None
+        self.pid = None
+
+    def _claim_slot(self):
+        # Runs on first use and again in a forked child, which must not
+        # keep generating from its parent's slot. Closing the inherited file
+        # leaves the parent's lock in place.
+        if self.slot_lock is not None:
+            self.slot_lock.release()
+        self.slot_lock = SlotLock(self.lock_dir)
+        self.pid = os.getpid()
+        self.worker = (self.host << SLOT_BITS) | self.slot_lock.slot
+        self.last_ms = -1
+        self.sequence = 0
+
+    @property
+    def slot(self):
+        return self.slot_lock.slot if self.slot_lock else None
+
+    def next_int(self):
+        with self.lock:
+            if self.pid != os.getpid():
+                self._claim_slot()
+            now_ms = self.clock() // 1_000_000 - ID_EPOCH_MS
+            if now_ms > self.last_ms:
+                self.last_ms, self.sequence = now_ms, 0
+            elif self.sequence < MAX_SEQUENCE:
+                self.sequence += 1
+            else:
+                self.last_ms, self.sequence = self.last_ms + 1, 0
+            return (
+                (self.last_ms << (WORKER_BITS + SEQUENCE_BITS))
+                | (self.worker << SEQUENCE_BITS)
+                | self.sequence
+            )
+
+    def next_id(self, prefix=''):
+        return prefix + encode(self.next_int())
+
+    def close(self):
+        with self.lock:
+            if self.slot_lock is not None:
+                self.slot_lock.release()
+            self.slot_lock = self.pid = None
+
+
+_generator = None
+_generator_lock = threading.Lock()
+
+
+def get_generator():
+    """The process-wide generator built from ``settings.ID_GENERATOR``"""
+    global _generator
+    if _generator is None:
+        with _generator_lock:
+            if _generator is None:
+                _generator = import_string(settings.ID_GENERATOR)()
+    return _generator
+
+
+def new_id(prefix=''):
+    """Return a new unique id, e.g. ``new_id('ORD-')``"""
+    return get_generator().next_id(prefix)
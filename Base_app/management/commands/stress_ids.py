@@ -0,0 +1,55 @@
+import multiprocessing
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from Base_app.ids import TimeOrderedIdGenerator, parts
+
+
+def generate(count, host, lock_dir):
+    """Generate ``count`` ids in a fresh generator; runs in a pool process"""
+    generator = TimeOrderedIdGenerator(host=host, lock_dir=lock_dir)
+    ids = [generator.next_int() for _ in range(count)]
+    generator.close()
+    return ids
+
+
+def stress(processes, count, host=0, lock_dir=None):
+    """
+    Generate ``count`` ids in each of ``processes`` concurrent processes and
+    return the per-process lists. Each task gets a process of its own, as a
+    real worker would.
+    """
+    lock_dir = lock_dir or tempfile.mkdtemp(prefix='foodhub_ids_')
+    with multiprocessing.Pool(processes, maxtasksperchild=1) as pool:
+        return pool.starmap(generate, [(count, host, lock_dir)] * processes)
+
+
+class Command(BaseCommand):
+    help = 'Generate ids in many processes at once and check none collide'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=8)
+        parser.add_argument('--count', type=int, default=250000, help='Ids per process')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        batches = stress(options['processes'], options['count'], settings.ID_HOST)
+        elapsed = time.perf_counter() - start
+
+        total = sum(len(ids) for ids in batches)
+        unique = len(set().union(*batches))
+        workers = {parts(ids[0])[1] for ids in batches}
+        unordered = sum(
+            1 for ids in batches if any(a >= b for a, b in zip(ids, ids[1:]))
+        )
+        self.stdout.write(
+            f'{total} ids from {len(workers)} workers in {elapsed:.2f}s '
+            f'({total / elapsed:,.0f}/s), {total - unique} collisions, '
+            f'{unordered} workers out of order'
+        )
+        if unique != total or unordered:
+            raise CommandError('Id generation is not collision-free and monotonic')
+        self.stdout.write(self.style.SUCCESS('No collisions.'))
@@ -0,0 +1,78 @@
+"""
+Static files storage with minified, content-hashed and precompressed assets.
+
+``collectstatic`` minifies CSS and JavaScript as it copies them
+(Base_app.minify), writes every file under a name that embeds a hash of its
+content (ManifestStaticFilesStorage) and, for text assets, ``.gz`` and ``.br``
+siblings that Base_app.assets serves by ``Accept-Encoding``. Brotli copies are
+skipped when the optional ``brotli`` package is not installed.
+"""
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+from .minify import MINIFIERS
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {
+    '.css', '.js', '.mjs', '.json', '.map', '.svg', '.txt', '.xml', '.html', '.ico', '.ttf', '.eot',
+}
+
+# Our own bundles under STATICFILES_DIRS; third-party files (admin, ...) are copied as is
+MINIFY_PREFIXES = ('css/', 'js/')
+
+# A compressed copy must save at least this share of the original to be kept
+MIN_SAVING = 0.05
+
+
+def compressed_variants(data):
+    """Yield ``(suffix, bytes)`` for each encoding worth storing"""
+    encoders = [('.gz', lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        encoders.append(('.br', lambda d: brotli.compress(d, quality=11)))
+    for suffix, encode in encoders:
+        compressed = encode(data)
+        if len(compressed) <= len(data) * (1 - MIN_SAVING):
+            yield suffix, compressed
+
+
+def write_compressed(path):
+    """Write the ``.gz``/``.br`` siblings of the file at ``path``"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    written = []
+    for suffix, compressed in compressed_variants(data):
+        with open(path + suffix, 'wb') as f:
+            f.write(compressed)
+        written.append(path + suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage that also minifies and precompresses text assets"""
+
+    def save(self, name, content, max_length=None):
+        # collectstatic copies source files through save(); post_process
+        # writes the hashed copies through _save() and is left alone
+        base, ext = os.path.splitext(name)
+        minify = MINIFIERS.get(ext.lower())
+        if minify is not None and name.startswith(MINIFY_PREFIXES) and not base.endswith('.min'):
+            content.seek(0)
+            text = content.read().decode('utf-8')
+            content = ContentFile(minify(text).encode('utf-8'))
+        return super().save(name, content, max_length=max_length)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS and self.exists(name):
+                write_compressed(self.path(name))
@@ -0,0 +1,42 @@
+"""
+Base classes shared by the apps' test modules.
+
+Every test case runs against a private in-memory cache, so its
+cache.clear() never touches the site's file-based cache, whichever runner
+starts the tests. Test modules import SimpleTestCase and TestCase from
+here rather than from django.test.
+"""
+from django import test
+from django.test import override_settings
+
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'foodhub-tests',
+    },
+    'cart_counts': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'foodhub-tests-cart-counts',
+    },
+}
+
+# The test runner turns DEBUG off, and nothing has been collected yet
+PLAIN_STATIC_STORAGE = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SimpleTestCase(test.SimpleTestCase):
+    """SimpleTestCase with the test cache"""
+
+
+@override_settings(CACHES=TEST_CACHES)
+class TestCase(test.TestCase):
+    """TestCase with the test cache"""
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGE)
+class PageTestCase(TestCase):
+    """TestCase for tests that render pages, whose {% static %} tags need no manifest"""
@@ -1,3 +1,289 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import re
+import shutil
+import tempfile
+from datetime import date, time
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from Base_app import ids
+from Base_app.assets import serve_file
+from Base_app.management.commands.stress_ids import stress
+from Base_app.minify import minify_css, minify_js
+from Base_app.testing import PageTestCase, SimpleTestCase
+from booking.models import Reservation
+from menu.models import Category, FoodItem
+from orders.models import Order, OrderItem
+from payments.models import Payment
+
+
+# Tables that grow with traffic; filtered queries on them must use an index
+HOT_TABLES = [
+    'menu_fooditem',
+    'orders_order',
+    'orders_orderitem',
+    'payments_payment',
+    'booking_reservation',
+    'cart_cartitem',
+]
+
+
+def query_plan(sql, params=()):
+    """Return the EXPLAIN QUERY PLAN detail lines of a query"""
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def table_scans(plan):
+    """Return the hot tables that a plan reads with a full table scan"""
+    scans = []
+    for line in plan:
+        match = re.match(r'SCAN (\w+)', line)
+        if match and match.group(1) in HOT_TABLES and 'USING' not in line:
+            scans.append(match.group(1))
+    return scans
+
+
+class QueryPlanTests(PageTestCase):
+    """Hot-path queries must be served by an index, never by a full table scan"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pass', is_staff=True)
+        cls.customer = User.objects.create_user('customer', 'customer@example.com', 'pass')
+        category = Category.objects.create(name='Biryani')
+        cls.food_item = FoodItem.objects.create(
+            name='Chicken Biryani', category=category, description='Spicy rice',
+            price='199.00', image='menu_items/biryani.jpg',
+        )
+        cls.order = Order.objects.create(
+            user=cls.customer, order_number='ORD-PLAN0001', total_price='199.00',
+            delivery_address='1 Main Street', phone='9999999999',
+        )
+        OrderItem.objects.create(order=cls.order, food_item=cls.food_item, quantity=1, price='199.00')
+        Payment.objects.create(
+            user=cls.customer, order=cls.order, amount='199.00', status='pending',
+            razorpay_order_id='order_plan_1', transaction_id='RAZ-PLAN0001',
+        )
+        Reservation.objects.create(
+            user=cls.customer, name='Customer', email='customer@example.com', phone='9999999999',
+            reservation_date=date(2026, 1, 1), reservation_time=time(19, 30), number_of_guests=2,
+        )
+
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Query plans are checked on SQLite')
+        cache.clear()
+
+    def assertUsesIndex(self, queryset, index_name):
+        sql, params = queryset.query.sql_with_params()
+        plan = query_plan(sql, params)
+        self.assertTrue(
+            any(index_name in line for line in plan),
+            f'{index_name} not used:\n' + '\n'.join(plan),
+        )
+        self.assertFalse(
+            any('TEMP B-TREE' in line for line in plan),
+            'Query sorts in a temporary B-tree:\n' + '\n'.join(plan),
+        )
+
+    def assertNoTableScans(self, captured_queries):
+        for query in captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT') or ' WHERE ' not in sql:
+                continue
+            scans = table_scans(query_plan(sql))
+            self.assertEqual(scans, [], f'Full table scan of {scans} in:\n{sql}')
+
+    def test_food_item_by_category_uses_index(self):
+        # FoodItem.Meta.ordering, as the menu grid sorts
+        queryset = FoodItem.objects.filter(category_id=1, available=True)
+        self.assertUsesIndex(queryset, 'menu_food_cat_created_idx')
+
+    def test_user_order_history_uses_index(self):
+        self.assertUsesIndex(Order.objects.filter(user=self.customer), 'orders_user_created_idx')
+
+    def test_orders_by_status_use_index(self):
+        self.assertUsesIndex(Order.objects.filter(status='pending'), 'orders_status_created_idx')
+
+    def test_payments_by_status_use_index(self):
+        queryset = Payment.objects.filter(status='completed').order_by('created_at')
+        self.assertUsesIndex(queryset, 'payments_status_created_idx')
+
+    def test_payment_by_razorpay_order_uses_index(self):
+        queryset = Payment.objects.filter(razorpay_order_id='order_plan_1')
+        sql, params = queryset.query.sql_with_params()
+        self.assertTrue(any('payments_razorpay_order_idx' in line for line in query_plan(sql, params)))
+
+    def test_reservations_by_date_use_index(self):
+        queryset = Reservation.objects.filter(reservation_date=date(2026, 1, 1), status='pending')
+        self.assertUsesIndex(queryset, 'booking_date_time_status_idx')
+
+    def test_customer_views_do_not_scan(self):
+        self.client.force_login(self.customer)
+        urls = [
+            '/',
+            '/menu/',
+            '/menu/search/?q=chicken',
+            '/cart/',
+            '/orders/',
+            f'/orders/{self.order.order_number}/',
+            f'/payment/checkout/{self.order.order_number}/',
+            '/booking/my-reservations/',
+        ]
+        for url in urls:
+            with self.subTest(url=url), CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            self.assertNoTableScans(ctx.captured_queries)
+
+    def test_staff_views_do_not_scan(self):
+        self.client.force_login(self.admin)
+        urls = [
+            '/dashboard/',
+            '/dashboard/orders/?status=pending',
+            '/dashboard/reservations/?status=pending',
+            '/dashboard/analytics/',
+        ]
+        for url in urls:
+            with self.subTest(url=url), CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            self.assertNoTableScans(ctx.captured_queries)
+
+    def test_verify_payment_does_not_scan(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(
+                '/payment/verify/',
+                data=json.dumps({
+                    'razorpay_order_id': 'order_plan_1',
+                    'razorpay_payment_id': 'pay_plan_1',
+                    'razorpay_signature': 'signature',
+                }),
+                content_type='application/json',
+            )
+        self.assertNoTableScans(ctx.captured_queries)
+
+
+class AssetServingTests(SimpleTestCase):
+    """Base_app.assets serves files with long-lived caching, compression and ranges"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.body = b'body { color: red; }\n' * 100
+        self.name = 'app.0123456789ab.css'
+        with open(os.path.join(self.root, self.name), 'wb') as f:
+            f.write(self.body)
+        with open(os.path.join(self.root, 'plain.css'), 'wb') as f:
+            f.write(self.body)
+
+    def get(self, name, hashed_names=True, **headers):
+        request = RequestFactory().get('/static/' + name, headers=headers)
+        response = serve_file(request, self.root, name, hashed_names)
+        self.addCleanup(response.close)
+        return response
+
+    def test_hashed_names_are_immutable(self):
+        self.assertIn('immutable', self.get(self.name)['Cache-Control'])
+        self.assertNotIn('immutable', self.get('plain.css')['Cache-Control'])
+
+    def test_uploads_are_never_immutable(self):
+        self.assertNotIn('immutable', self.get(self.name, hashed_names=False)['Cache-Control'])
+
+    def test_etag_revalidation(self):
+        etag = self.get(self.name)['ETag']
+        self.assertEqual(self.get(self.name, if_none_match=etag).status_code, 304)
+
+    def test_precompressed_copy(self):
+        with open(os.path.join(self.root, self.name + '.gz'), 'wb') as f:
+            f.write(gzip.compress(self.body))
+        response = self.get(self.name, accept_encoding='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), self.body)
+        self.assertNotIn('Content-Encoding', self.get(self.name))
+
+    def test_each_encoding_has_its_own_etag(self):
+        with open(os.path.join(self.root, self.name + '.gz'), 'wb') as f:
+            f.write(gzip.compress(self.body))
+        identity = self.get(self.name)['ETag']
+        gzipped = self.get(self.name, accept_encoding='gzip')['ETag']
+        self.assertNotEqual(identity, gzipped)
+        self.assertEqual(self.get(self.name, accept_encoding='gzip', if_none_match=gzipped).status_code, 304)
+        # A cached gzip body is no use to a client that can't decode it
+        self.assertEqual(self.get(self.name, if_none_match=gzipped).status_code, 200)
+        # Ranges are served from the identity file, so If-Range names its ETag
+        response = self.get(self.name, accept_encoding='gzip', range='bytes=0-9', if_range=identity)
+        self.assertEqual(response.status_code, 206)
+
+    def test_range(self):
+        response = self.get(self.name, range='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.body)}')
+        self.assertEqual(b''.join(response.streaming_content), self.body[10:20])
+        self.assertEqual(self.get(self.name, range=f'bytes={len(self.body)}-').status_code, 416)
+
+    def test_path_traversal(self):
+        self.assertEqual(self.get('../etc/passwd').status_code, 404)
+
+
+class MinifyTests(SimpleTestCase):
+
+    def test_css(self):
+        css = '/* header */\n.a > .b {\n    color: red;\n    content: "  x  ";\n}\n'
+        self.assertEqual(minify_css(css), '.a>.b{color:red;content:"  x  "}')
+
+    def test_js_keeps_strings_and_line_breaks(self):
+        js = "// setup\nconst url = 'http://x/' + id;  // trailing\n\n    /* block */ go(url);\n"
+        self.assertEqual(minify_js(js), "const url = 'http://x/' + id;\ngo(url);\n")
+
+
+class IdGeneratorTests(SimpleTestCase):
+    """Order and transaction numbers are unique, sortable and short"""
+
+    def setUp(self):
+        self.lock_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.lock_dir)
+
+    def generator(self, **kwargs):
+        generator = ids.TimeOrderedIdGenerator(host=0, lock_dir=self.lock_dir, **kwargs)
+        self.addCleanup(generator.close)
+        return generator
+
+    def test_format_fits_order_number_column(self):
+        order_number = self.generator().next_id('ORD-')
+        self.assertRegex(order_number, r'^ORD-[0-9A-HJKMNP-TV-Z]{13}$')
+        self.assertLessEqual(len(order_number), Order._meta.get_field('order_number').max_length)
+        self.assertEqual(ids.encode(ids.decode(order_number)), order_number[4:])
+
+    def test_monotonic_when_clock_steps_back_or_sequence_overflows(self):
+        now = (ids.ID_EPOCH_MS + 1000) * 1_000_000
+        ticks = iter([now] * (ids.MAX_SEQUENCE + 10) + [now - 5_000_000] * 10)
+        generator = self.generator(clock=lambda: next(ticks))
+        numbers = [generator.next_int() for _ in range(ids.MAX_SEQUENCE + 20)]
+        self.assertTrue(all(a < b for a, b in zip(numbers, numbers[1:])))
+        strings = [ids.encode(number) for number in numbers]
+        self.assertEqual(strings, sorted(strings))
+
+    def test_live_generators_hold_distinct_slots(self):
+        first, second = self.generator(), self.generator()
+        first.next_int(), second.next_int()
+        self.assertNotEqual(first.slot, second.slot)
+        freed = first.slot
+        first.close()
+        third = self.generator()
+        third.next_int()
+        self.assertEqual(third.slot, freed)
+
+    def test_no_collisions_across_processes(self):
+        batches = stress(4, 50000, lock_dir=self.lock_dir)
+        total = sum(len(batch) for batch in batches)
+        self.assertEqual(len(set().union(*batches)), total)
+        self.assertEqual(len({ids.parts(batch[0])[1] for batch in batches}), 4)
+        for batch in batches:
+            self.assertTrue(all(a < b for a, b in zip(batch, batch[1:])))
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
 import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -58,6 +59,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'Base_app.assets.AssetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -79,6 +81,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'cart.context_processors.cart_badge',
             ],
         },
     },
@@ -98,6 +101,35 @@ DATABASES = {
 }
 
 
+# Cache
+# A file-based cache is shared by every gunicorn worker on the host, which is
+# what the catalog version stamp (menu.catalog) relies on. It lives in the
+# project, so two checkouts never share version stamps. When it is full, a
+# tenth of the entries are culled at random, so the per-user cart badge
+# counts (cart.badge) live in a cache of their own and cannot crowd out the
+# version stamps. Tests swap in private in-memory caches (Base_app.testing),
+# so their cache.clear() never touches the site's.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+            'CULL_FREQUENCY': 10,
+        },
+    },
+    'cart_counts': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'cart_counts',
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+            'CULL_FREQUENCY': 10,
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -134,6 +166,8 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 
+# collectstatic output, served by Base_app.assets.AssetMiddleware when DEBUG is off
+STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, "static")]
 
@@ -141,6 +175,44 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, "Media")
 
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        # Content-hashed names plus .gz/.br copies (Base_app.storage)
+        'BACKEND': 'Base_app.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Processes that resize uploaded food images (menu.images)
+IMAGE_VARIANT_WORKERS = 2
+
+# Order and transaction numbers (Base_app.ids). Give every host that serves
+# the site its own ID_HOST, 0-7.
+ID_GENERATOR = 'Base_app.ids.TimeOrderedIdGenerator'
+ID_HOST = int(os.environ.get('FOODHUB_ID_HOST', '0'))
+ID_LOCK_DIR = os.path.join(tempfile.gettempdir(), 'foodhub_ids')
+
+# Live order status push (orders.events). SocketBroker reaches every worker
+# process on the host; LocalBroker only the process that made the change.
+ORDER_EVENTS_BROKER = 'orders.events.SocketBroker' if os.name == 'posix' else 'orders.events.LocalBroker'
+ORDER_EVENTS_SOCKET_DIR = os.path.join(tempfile.gettempdir(), 'foodhub_events')
+
+# Delivery estimates (orders.kitchen)
+KITCHEN_COOKS = 3
+DELIVERY_MINUTES = 15
+# Written by `manage.py train_eta_model` (orders.eta)
+ETA_MODEL_PATH = os.path.join(BASE_DIR, 'eta_model.npz')
+
+# Hot/cold archival (orders.archive): finished orders older than this many
+# days move to the archive tables, this many per transaction. To keep the
+# archive in its own SQLite file, add it to DATABASES and name it here.
+ORDER_ARCHIVE_DAYS = 90
+ORDER_ARCHIVE_BATCH = 500
+ORDER_ARCHIVE_DATABASE = 'default'
+DATABASE_ROUTERS = ['orders.routers.ArchiveRouter']
+
 # Authentication settings
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'home'
@@ -153,6 +225,13 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 RAZORPAY_KEY_ID = 'rzp_test_xxxxxxxxxxxxx'
 RAZORPAY_KEY_SECRET = 'xxxxxxxxxxxxx'
 
+# Payment gateway client (payments.gateway), one per worker process, and its
+# keyword arguments, e.g. {'timeout': (3.05, 10), 'retries': 2, 'pool_size': 10}.
+# Use 'payments.gateway.FakeGateway' (options: latency, failure_rate) to run
+# load tests and CI without the network.
+PAYMENT_GATEWAY = os.environ.get('FOODHUB_PAYMENT_GATEWAY', 'payments.gateway.RazorpayGateway')
+PAYMENT_GATEWAY_OPTIONS = {}
+
 # Django Sites Framework (required by allauth)
 SITE_ID = 1
 
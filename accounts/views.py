@@ -3,16 +3,19 @@ from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib import messages
+from django.views.decorators.csrf import ensure_csrf_cookie
 from django.views.decorators.http import require_http_methods
 from Base_app.models import ContactMessage
+from menu.conditional import catalog_page_condition
 
 @require_http_methods(["GET", "POST"])
+@ensure_csrf_cookie
+@catalog_page_condition
 def home(request):
     """Homepage view"""
-    from menu.models import FoodItem
-    featured_items = FoodItem.objects.filter(available=True)[:6]
+    from menu.catalog import get_catalog
     context = {
-        'featured_items': featured_items,
+        'featured_items': get_catalog().featured,
     }
     return render(request, 'home.html', context)
 
@@ -65,10 +68,8 @@ def user_login(request):
         user = authenticate(request, username=username, password=password)
         
         if user is not None:
+            # Any guest cart is merged by cart.signals; carts are created on first use
             login(request, user)
-            # Create cart for user if it doesn't exist
-            from cart.models import Cart
-            Cart.objects.get_or_create(user=user)
             messages.success(request, f'Welcome back, {username}!')
             next_page = request.GET.get('next', 'home')
             return redirect(next_page)
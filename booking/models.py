@@ -27,6 +27,9 @@ class Reservation(models.Model):
     
     class Meta:
         ordering = ['reservation_date', 'reservation_time']
+        indexes = [
+            models.Index(fields=['reservation_date', 'reservation_time', 'status'], name='booking_date_time_status_idx'),
+        ]
     
     def __str__(self):
         return f"Reservation for {self.name} - {self.reservation_date} at {self.reservation_time}"
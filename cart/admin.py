@@ -10,7 +10,7 @@ class CartItemInline(admin.TabularInline):
 
 @admin.register(Cart)
 class CartAdmin(admin.ModelAdmin):
-    list_display = ['user', 'created_at', 'updated_at']
+    list_display = ['user', 'item_count', 'subtotal', 'created_at', 'updated_at']
     search_fields = ['user__username']
-    readonly_fields = ['user', 'created_at', 'updated_at']
+    readonly_fields = ['user', 'item_count', 'subtotal', 'created_at', 'updated_at']
     inlines = [CartItemInline]
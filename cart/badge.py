@@ -0,0 +1,35 @@
+"""
+Navbar cart badge count, kept per user in the ``cart_counts`` cache.
+
+The count is written whenever a cart's running totals are refreshed (see
+Cart.refresh_totals), so rendering a page reads it from the cache instead of
+querying the cart. The counts have a cache of their own so that many users'
+counts never push the version stamps out of the default cache.
+"""
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.connection import ConnectionProxy
+
+cache = ConnectionProxy(caches, 'cart_counts')
+
+BADGE_CACHE_KEY = 'cart:count:%s'
+BADGE_TIMEOUT = 60 * 60 * 24
+
+
+def set_cart_count(user_id, count):
+    """Publish a user's cart count once the current transaction commits"""
+    transaction.on_commit(
+        lambda: cache.set(BADGE_CACHE_KEY % user_id, count, BADGE_TIMEOUT)
+    )
+
+
+def get_cart_count(user):
+    """Return a user's cart count, loading it from the database on a cache miss"""
+    key = BADGE_CACHE_KEY % user.pk
+    count = cache.get(key)
+    if count is None:
+        from .models import Cart
+
+        count = Cart.objects.filter(user=user).values_list('item_count', flat=True).first() or 0
+        cache.set(key, count, BADGE_TIMEOUT)
+    return count
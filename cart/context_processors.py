@@ -0,0 +1,12 @@
+from .badge import get_cart_count
+from .guest import GuestCart
+
+
+def cart_badge(request):
+    """Item count shown on the navbar cart icon"""
+    user = getattr(request, 'user', None)
+    if user is None:
+        return {'cart_count': 0}
+    if not user.is_authenticated:
+        return {'cart_count': GuestCart(request.session).item_count}
+    return {'cart_count': get_cart_count(user)}
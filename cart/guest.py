@@ -0,0 +1,93 @@
+"""
+Guest cart kept in the session.
+
+Anonymous visitors' carts are a ``{food_item_id: quantity}`` dict in their
+session, priced from the in-process catalog snapshot, so browsing and picking
+dishes never touches the cart tables. When the visitor logs in (or logs in
+after registering) the guest cart is folded into their cart.models.Cart with a
+single upsert; see cart.signals.
+"""
+from django.db import transaction
+
+from menu.catalog import get_catalog
+from . import pricing
+from .models import MAX_QUANTITY, Cart, CartItem
+
+SESSION_KEY = 'guest_cart'
+
+
+class GuestCart:
+    """Session-backed cart of an anonymous visitor"""
+
+    def __init__(self, session):
+        self.session = session
+        self.quantities = {int(pk): quantity for pk, quantity in session.get(SESSION_KEY, {}).items()}
+
+    def _save(self):
+        # Session keys must be JSON-serialisable strings
+        if self.quantities:
+            self.session[SESSION_KEY] = {str(pk): quantity for pk, quantity in self.quantities.items()}
+        else:
+            self.session.pop(SESSION_KEY, None)
+
+    def add(self, food_item_id, quantity):
+        self.quantities[food_item_id] = min(self.quantities.get(food_item_id, 0) + quantity, MAX_QUANTITY)
+        self._save()
+
+    def set_quantities(self, quantities):
+        for pk, quantity in quantities.items():
+            if quantity > 0:
+                self.quantities[pk] = quantity
+            else:
+                self.quantities.pop(pk, None)
+        self._save()
+
+    def remove(self, food_item_id):
+        self.quantities.pop(food_item_id, None)
+        self._save()
+
+    def clear(self):
+        self.quantities = {}
+        self._save()
+
+    def quote(self):
+        """Price the lines, in the order they were added"""
+        return pricing.quote(self.quantities.items())
+
+    @property
+    def item_count(self):
+        return sum(self.quantities.values())
+
+    @property
+    def subtotal(self):
+        return self.quote().subtotal
+
+    def __bool__(self):
+        return bool(self.quantities)
+
+
+def merge_guest_cart(request, user):
+    """Fold the session's guest cart into ``user``'s cart in one upsert"""
+    guest = GuestCart(request.session)
+    if not guest:
+        return
+
+    known = set(get_catalog().items_by_id)
+    quantities = {pk: quantity for pk, quantity in guest.quantities.items() if pk in known and quantity > 0}
+    with transaction.atomic():
+        cart, created = Cart.objects.select_for_update().get_or_create(user=user)
+        existing = dict(
+            CartItem.objects.filter(cart=cart, food_item_id__in=quantities)
+            .values_list('food_item_id', 'quantity')
+        )
+        CartItem.objects.bulk_create(
+            [
+                CartItem(cart=cart, food_item_id=pk, quantity=min(existing.get(pk, 0) + quantity, MAX_QUANTITY))
+                for pk, quantity in quantities.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['cart', 'food_item'],
+            update_fields=['quantity'],
+        )
+        cart.refresh_totals()
+    guest.clear()
@@ -0,0 +1,42 @@
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from cart import pricing
+from menu.models import FoodItem
+
+
+def synthetic_catalog(size):
+    """A catalog stand-in of ``size`` unsaved items with varied prices"""
+    items = [
+        FoodItem(pk=pk, name=f'Item {pk}', price=Decimal(99 + pk % 400) + Decimal('0.50'), available=True)
+        for pk in range(1, size + 1)
+    ]
+    return SimpleNamespace(items_by_id={item.pk: item for item in items})
+
+
+class Command(BaseCommand):
+    help = 'Time pricing.quote() at growing cart sizes and count its queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000])
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        sizes = options['sizes']
+        catalog = synthetic_catalog(max(sizes))
+        self.stdout.write(f"{'lines':>8} {'ms/quote':>10} {'us/line':>9} {'queries':>8}")
+        for size in sizes:
+            pairs = [(pk, 1 + pk % 5) for pk in range(1, size + 1)]
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                for _ in range(options['repeat']):
+                    pricing.quote(pairs, catalog)
+                elapsed = (time.perf_counter() - start) / options['repeat']
+            self.stdout.write(
+                f'{size:>8} {elapsed * 1e3:>10.3f} {elapsed * 1e6 / size:>9.2f} {len(ctx.captured_queries):>8}'
+            )
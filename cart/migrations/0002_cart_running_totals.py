@@ -0,0 +1,43 @@
+# Generated by Django 6.0.2 on 2026-10-18 19:05
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import DecimalField, F, Sum
+
+
+def fill_running_totals(apps, schema_editor):
+    Cart = apps.get_model('cart', 'Cart')
+    CartItem = apps.get_model('cart', 'CartItem')
+    totals = (
+        CartItem.objects.values('cart_id')
+        .annotate(
+            item_count=Sum('quantity'),
+            subtotal=Sum(F('quantity') * F('food_item__price'), output_field=DecimalField(max_digits=10, decimal_places=2)),
+        )
+    )
+    carts = []
+    for row in totals:
+        carts.append(Cart(pk=row['cart_id'], item_count=row['item_count'], subtotal=row['subtotal']))
+    Cart.objects.bulk_update(carts, ['item_count', 'subtotal'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='cart',
+            name='subtotal',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10),
+        ),
+        migrations.RunPython(fill_running_totals, migrations.RunPython.noop),
+    ]
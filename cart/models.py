@@ -1,25 +1,69 @@
+from decimal import Decimal
+
 from django.db import models
+from django.db.models import DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from menu.models import FoodItem
+from .badge import set_cart_count
+from . import pricing
+
 
 class Cart(models.Model):
     """Shopping cart for users"""
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='cart')
+    # Running totals, refreshed by the cart views after every change
+    item_count = models.PositiveIntegerField(default=0)
+    subtotal = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    def totals(self):
+        """Item count and value of the cart, computed in one aggregate query"""
+        totals = self.items.aggregate(
+            item_count=Coalesce(Sum('quantity'), 0),
+            subtotal=Coalesce(
+                Sum(F('quantity') * F('food_item__price'), output_field=DecimalField(max_digits=10, decimal_places=2)),
+                Value(Decimal('0.00')),
+                output_field=DecimalField(max_digits=10, decimal_places=2),
+            ),
+        )
+        # SQLite returns the sum without its scale; store and show whole paise
+        return totals['item_count'], pricing.to_money(totals['subtotal'])
+    
+    def refresh_totals(self):
+        """Recompute and store the running totals; call inside the mutation's transaction"""
+        self.item_count, self.subtotal = self.totals()
+        self.save(update_fields=['item_count', 'subtotal', 'updated_at'])
+        set_cart_count(self.user_id, self.item_count)
+        return self.item_count, self.subtotal
+    
+    def reset_totals(self):
+        """Zero the running totals after the cart's lines were deleted"""
+        self.item_count, self.subtotal = 0, Decimal('0.00')
+        self.save(update_fields=['item_count', 'subtotal', 'updated_at'])
+        set_cart_count(self.user_id, 0)
+    
+    def quote(self):
+        """Price the cart's lines against the catalog (one query for the lines)"""
+        return pricing.quote(self.items.order_by('added_at', 'pk').values_list('food_item_id', 'quantity'))
+    
     def get_total(self):
         """Calculate total cart value"""
-        return sum(item.get_total() for item in self.items.all())
+        return self.totals()[1]
     
     def get_item_count(self):
         """Get total number of items in cart"""
-        return sum(item.quantity for item in self.items.all())
+        return self.totals()[0]
     
     def __str__(self):
         return f"Cart of {self.user.username}"
 
 
+# Most of one dish a cart line may hold
+MAX_QUANTITY = 50
+
+
 class CartItem(models.Model):
     """Individual items in cart"""
     cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='items')
@@ -27,6 +71,11 @@ class CartItem(models.Model):
     quantity = models.PositiveIntegerField(default=1)
     added_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['cart', 'food_item'], name='cart_cartitem_cart_food_item'),
+        ]
+    
     def get_total(self):
         """Calculate total for this cart item"""
         return self.food_item.price * self.quantity
@@ -0,0 +1,126 @@
+"""
+Pricing engine.
+
+Every price shown or charged is computed here from ``(food_item_id,
+quantity)`` pairs and the unit prices of the in-process catalog snapshot
+(menu.catalog), so a quote costs no queries and is linear in the number of
+lines. All arithmetic is Decimal; money is rounded to paise once, with the
+same half-even rounding the cart and checkout pages have always used.
+"""
+from decimal import Decimal, ROUND_HALF_EVEN
+
+from menu.catalog import get_catalog
+
+DELIVERY_FEE = Decimal('50.00')
+TAX_RATE = Decimal('0.05')
+TAX_PERCENT = int(TAX_RATE * 100)
+PAISE = Decimal('0.01')
+ZERO = Decimal('0.00')
+
+
+class PricingError(ValueError):
+    """Raised when quote input cannot be priced"""
+
+
+def to_money(amount):
+    return amount.quantize(PAISE, rounding=ROUND_HALF_EVEN)
+
+
+def charges(subtotal):
+    """Return ``(delivery_fee, tax, grand_total)`` for a subtotal"""
+    tax = to_money((subtotal + DELIVERY_FEE) * TAX_RATE)
+    return DELIVERY_FEE, tax, to_money(subtotal + DELIVERY_FEE + tax)
+
+
+class QuoteLine:
+    """One priced line; shaped like a CartItem with a ``line_total``"""
+
+    __slots__ = ('food_item', 'quantity', 'unit_price', 'line_total')
+
+    def __init__(self, food_item, quantity):
+        self.food_item = food_item
+        self.quantity = quantity
+        self.unit_price = food_item.price
+        self.line_total = to_money(food_item.price * quantity)
+
+    def get_total(self):
+        return self.line_total
+
+    def to_dict(self):
+        return {
+            'id': self.food_item.pk,
+            'name': self.food_item.name,
+            'quantity': self.quantity,
+            'unit_price': str(self.unit_price),
+            'line_total': str(self.line_total),
+            'available': self.food_item.available,
+        }
+
+
+class Quote:
+    """Lines, totals and charges of one cart"""
+
+    def __init__(self, lines, unknown=()):
+        self.lines = lines
+        self.unknown = list(unknown)
+        self.item_count = sum(line.quantity for line in lines)
+        self.subtotal = sum((line.line_total for line in lines), ZERO)
+        self.delivery_fee, self.tax, self.grand_total = charges(self.subtotal)
+
+    @property
+    def unavailable(self):
+        return [line.food_item.pk for line in self.lines if not line.food_item.available]
+
+    def to_dict(self):
+        return {
+            'items': [line.to_dict() for line in self.lines],
+            'item_count': self.item_count,
+            'subtotal': str(self.subtotal),
+            'delivery_fee': str(self.delivery_fee),
+            'tax': str(self.tax),
+            'tax_percent': TAX_PERCENT,
+            'grand_total': str(self.grand_total),
+            'unknown': self.unknown,
+            'unavailable': self.unavailable,
+        }
+
+
+def quote(pairs, catalog=None):
+    """
+    Price ``(food_item_id, quantity)`` pairs. Repeated items are merged in
+    first-seen order; ids missing from the catalog are reported in
+    ``Quote.unknown`` instead of being priced.
+    """
+    items_by_id = (catalog or get_catalog()).items_by_id
+    quantities = {}
+    for food_item_id, quantity in pairs:
+        if isinstance(quantity, bool) or not isinstance(quantity, int) or quantity < 0:
+            raise PricingError(f'Invalid quantity for item {food_item_id}')
+        quantities[food_item_id] = quantities.get(food_item_id, 0) + quantity
+
+    lines, unknown = [], []
+    for food_item_id, quantity in quantities.items():
+        food_item = items_by_id.get(food_item_id)
+        if food_item is None:
+            unknown.append(food_item_id)
+        elif quantity:
+            lines.append(QuoteLine(food_item, quantity))
+    return Quote(lines, unknown)
+
+
+def parse_items(items):
+    """Read ``[{"id": 1, "quantity": 2}, ...]`` or ``[[1, 2], ...]`` into pairs"""
+    if not isinstance(items, list):
+        raise PricingError('"items" must be a list')
+    pairs = []
+    for entry in items:
+        if isinstance(entry, dict):
+            food_item_id, quantity = entry.get('id'), entry.get('quantity', 1)
+        elif isinstance(entry, list) and len(entry) == 2:
+            food_item_id, quantity = entry
+        else:
+            raise PricingError('Each item must be {"id", "quantity"} or [id, quantity]')
+        if isinstance(food_item_id, bool) or not isinstance(food_item_id, int):
+            raise PricingError('Item ids must be integers')
+        pairs.append((food_item_id, quantity))
+    return pairs
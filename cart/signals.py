@@ -0,0 +1,11 @@
+from django.contrib.auth.signals import user_logged_in
+from django.dispatch import receiver
+
+from .guest import merge_guest_cart
+
+
+@receiver(user_logged_in)
+def merge_cart_on_login(sender, request, user, **kwargs):
+    """Move the visitor's guest cart into their account cart"""
+    if request is not None and hasattr(request, 'session'):
+        merge_guest_cart(request, user)
@@ -0,0 +1,221 @@
+import json
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from Base_app.testing import PageTestCase, TestCase
+from cart import badge, pricing
+from cart.management.commands.benchmark_quotes import synthetic_catalog
+from cart.models import MAX_QUANTITY, Cart, CartItem
+from menu import catalog
+from menu.models import Category, FoodItem
+
+
+class CartTotalsTests(TestCase):
+    """Cart endpoints cost the same number of queries whatever the cart size"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('shopper', 'shopper@example.com', 'pass')
+        category = Category.objects.create(name='Starters')
+        cls.items = [
+            FoodItem.objects.create(
+                name=f'Dish {i}', category=category, description='Tasty',
+                price='100.00', image='menu_items/dish.jpg',
+            )
+            for i in range(6)
+        ]
+
+    def setUp(self):
+        catalog.reset()
+        self.client.force_login(self.user)
+
+    def add(self, item, quantity=2):
+        return self.client.post(
+            f'/cart/add/{item.pk}/', {'quantity': quantity}, headers={'x-requested-with': 'XMLHttpRequest'},
+        )
+
+    def batch(self, quantities):
+        return self.client.post(
+            '/cart/update/', data=json.dumps({'quantities': quantities}), content_type='application/json',
+        )
+
+    def test_running_totals(self):
+        for item in self.items[:3]:
+            response = self.add(item)
+        self.assertEqual(response.json()['cart_count'], 6)
+        self.assertEqual(response.json()['cart_total'], '600.00')
+        cart = Cart.objects.get(user=self.user)
+        self.assertEqual((cart.item_count, cart.subtotal), cart.totals())
+
+    def test_add_to_cart_queries_do_not_grow(self):
+        self.add(self.items[0])
+        with CaptureQueriesContext(connection) as small:
+            self.add(self.items[1])
+        for item in self.items[2:]:
+            self.add(item)
+        self.assertEqual(CartItem.objects.filter(cart__user=self.user).count(), len(self.items))
+        with CaptureQueriesContext(connection) as large:
+            self.add(self.items[0])
+        self.assertEqual(len(small), len(large))
+
+    def test_batch_update(self):
+        for item in self.items[:3]:
+            self.add(item)
+        quantities = {self.items[0].pk: 5, self.items[1].pk: 0, self.items[3].pk: 1}
+        data = self.batch(quantities).json()
+        self.assertEqual(data['cart_count'], 8)
+        self.assertEqual(set(data['items']), {str(self.items[i].pk) for i in (0, 2, 3)})
+        self.assertEqual(data['items'][str(self.items[0].pk)], {'quantity': 5, 'line_total': '500.00'})
+
+    def test_repeated_adds_share_one_line(self):
+        self.add(self.items[0])
+        self.add(self.items[0])
+        line = CartItem.objects.get(cart__user=self.user, food_item=self.items[0])
+        self.assertEqual(line.quantity, 4)
+
+    def test_quantities_are_validated(self):
+        for quantity in ('two', '2.5', ''):
+            with self.subTest(quantity=quantity):
+                self.assertEqual(self.add(self.items[0], quantity).status_code, 400)
+        for quantity in (1.5, True, 'two', None):
+            with self.subTest(quantity=quantity):
+                self.assertEqual(self.batch({self.items[0].pk: quantity}).status_code, 400)
+        self.assertFalse(CartItem.objects.filter(cart__user=self.user).exists())
+
+    def test_quantities_are_clamped(self):
+        self.add(self.items[0], -3)
+        line = CartItem.objects.get(cart__user=self.user, food_item=self.items[0])
+        self.assertEqual(line.quantity, 1)
+        # Each add is capped, and so is the line they add up to
+        self.add(self.items[0], 40)
+        self.add(self.items[0], 40)
+        line.refresh_from_db()
+        self.assertEqual(line.quantity, MAX_QUANTITY)
+        data = self.batch({self.items[1].pk: 500, self.items[0].pk: -1}).json()
+        self.assertEqual(data['items'], {str(self.items[1].pk): {'quantity': MAX_QUANTITY, 'line_total': '5000.00'}})
+
+
+class CartBadgeTests(PageTestCase):
+    """The navbar cart badge is read from the cache, not the cart tables"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('badge', 'badge@example.com', 'pass')
+        category = Category.objects.create(name='Desserts')
+        cls.food_item = FoodItem.objects.create(
+            name='Kulfi', category=category, description='Cold', price='60.00', image='menu_items/kulfi.jpg',
+        )
+
+    def setUp(self):
+        cache.clear()
+        badge.cache.clear()
+        catalog.reset()
+        self.client.force_login(self.user)
+
+    def test_badge_follows_cart_changes_without_queries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/cart/add/{self.food_item.pk}/', {'quantity': 3})
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/about/')
+        self.assertContains(response, '<span class="cart-badge">3</span>', html=True)
+        self.assertFalse([q for q in ctx.captured_queries if 'cart_' in q['sql']])
+
+    def test_counts_stay_out_of_the_default_cache(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/cart/add/{self.food_item.pk}/', {'quantity': 2})
+        key = badge.BADGE_CACHE_KEY % self.user.pk
+        self.assertEqual(badge.cache.get(key), 2)
+        self.assertIsNone(cache.get(key))
+
+
+class GuestCartTests(PageTestCase):
+    """Anonymous carts live in the session and are merged at login"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('guest', 'guest@example.com', 'pass')
+        category = Category.objects.create(name='Breads')
+        cls.naan, cls.roti = [
+            FoodItem.objects.create(
+                name=name, category=category, description='Fresh', price='40.00', image='menu_items/bread.jpg',
+            )
+            for name in ('Naan', 'Roti')
+        ]
+
+    def setUp(self):
+        cache.clear()
+        catalog.reset()
+
+    def test_guest_cart_does_not_touch_cart_tables(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(f'/cart/add/{self.naan.pk}/', {'quantity': 2})
+            response = self.client.get('/cart/')
+        self.assertEqual(response.context['item_count'], 2)
+        self.assertFalse([q for q in ctx.captured_queries if 'cart_' in q['sql']])
+
+    def test_guest_cart_merges_at_login(self):
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, food_item=self.naan, quantity=1)
+        self.client.post(f'/cart/add/{self.naan.pk}/', {'quantity': 2})
+        self.client.post(f'/cart/add/{self.roti.pk}/', {'quantity': 3})
+        self.client.post('/login/', {'username': 'guest', 'password': 'pass'})
+        quantities = dict(CartItem.objects.filter(cart=cart).values_list('food_item_id', 'quantity'))
+        self.assertEqual(quantities, {self.naan.pk: 3, self.roti.pk: 3})
+        self.assertNotIn('guest_cart', self.client.session)
+
+    def test_merged_lines_are_capped(self):
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, food_item=self.naan, quantity=40)
+        for quantity in (30, 30):
+            self.client.post(f'/cart/add/{self.naan.pk}/', {'quantity': quantity})
+        self.assertEqual(self.client.session['guest_cart'], {str(self.naan.pk): MAX_QUANTITY})
+        self.client.post('/login/', {'username': 'guest', 'password': 'pass'})
+        self.assertEqual(CartItem.objects.get(cart=cart).quantity, MAX_QUANTITY)
+
+
+class PricingTests(TestCase):
+    """Quotes are Decimal-exact and priced from the catalog without queries"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Curries')
+        cls.paneer = FoodItem.objects.create(
+            name='Paneer', category=category, description='Rich', price='149.99', image='menu_items/paneer.jpg',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_quote_totals(self):
+        quote = pricing.quote([(self.paneer.pk, 2), (self.paneer.pk, 1), (999999, 1)])
+        self.assertEqual(quote.item_count, 3)
+        self.assertEqual(quote.subtotal, Decimal('449.97'))
+        self.assertEqual(quote.tax, Decimal('25.00'))  # 24.9985 rounded to paise
+        self.assertEqual(quote.grand_total, Decimal('524.97'))
+        self.assertEqual(quote.unknown, [999999])
+
+    def test_no_per_item_queries(self):
+        for size in (10, 1000):
+            catalog = synthetic_catalog(size)
+            with self.assertNumQueries(0):
+                quote = pricing.quote([(pk, 2) for pk in range(1, size + 1)], catalog)
+            self.assertEqual(len(quote.lines), size)
+
+    def test_quote_api_many_carts(self):
+        response = self.client.post('/cart/api/quote/', data=json.dumps({'carts': [
+            {'id': 'a', 'items': [{'id': self.paneer.pk, 'quantity': 1}]},
+            {'id': 'b', 'items': [[self.paneer.pk, 4]]},
+        ]}), content_type='application/json')
+        quotes = response.json()['quotes']
+        self.assertEqual([q['id'] for q in quotes], ['a', 'b'])
+        self.assertEqual(quotes[1]['subtotal'], '599.96')
+
+    def test_quote_api_rejects_bad_quantities(self):
+        response = self.client.post(
+            '/cart/api/quote/', data=json.dumps({'items': [[self.paneer.pk, -1]]}), content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
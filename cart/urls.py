@@ -5,6 +5,8 @@ urlpatterns = [
     path('', views.view_cart, name='view_cart'),
     path('add/<int:item_id>/', views.add_to_cart, name='add_to_cart'),
     path('remove/<int:item_id>/', views.remove_from_cart, name='remove_from_cart'),
+    path('update/', views.update_cart_batch, name='update_cart_batch'),
     path('update/<int:item_id>/', views.update_cart, name='update_cart'),
     path('clear/', views.clear_cart, name='clear_cart'),
+    path('api/quote/', views.quote_api, name='quote_api'),
 ]
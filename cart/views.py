@@ -1,121 +1,278 @@
-from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib.auth.decorators import login_required
+from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.views.decorators.http import require_http_methods
-from django.http import JsonResponse
-from decimal import Decimal
-from menu.models import FoodItem
-from .models import Cart, CartItem
+from django.http import Http404, HttpResponseBadRequest, JsonResponse
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Least
+from django.views.decorators.csrf import csrf_exempt
+import json
+from menu.catalog import get_catalog
+from .guest import GuestCart
+from . import pricing
+from .pricing import PricingError, parse_items
+from .models import MAX_QUANTITY, Cart, CartItem
 
 
-def get_user_cart(user):
-    """Get or create user's cart"""
-    cart, created = Cart.objects.get_or_create(user=user)
+def get_user_cart(user, lock=False):
+    """Get or create user's cart, locking its row for a mutation if asked"""
+    carts = Cart.objects.select_for_update() if lock else Cart.objects
+    cart, created = carts.get_or_create(user=user)
     return cart
 
 
-@login_required(login_url='login')
+MAX_QUOTE_CARTS = 100
+MAX_QUOTE_LINES = 1000
+
+
+def cart_json(cart, **extra):
+    """AJAX response body built from the cart's running totals"""
+    return JsonResponse({
+        'success': True,
+        'cart_count': cart.item_count,
+        'cart_total': str(cart.subtotal),
+        **extra,
+    })
+
+
+def parse_quantity(value, minimum=1):
+    """
+    Read a requested quantity, clamped to ``minimum``..MAX_QUANTITY. Raises
+    ValueError (or TypeError) unless it is a whole number.
+    """
+    if isinstance(value, (bool, float)):
+        raise ValueError(f'Invalid quantity {value!r}')
+    return max(minimum, min(int(value), MAX_QUANTITY))
+
+
+def invalid_quantity(request):
+    """400 response to a quantity that isn't a whole number"""
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        return JsonResponse({'success': False, 'error': 'Invalid quantity'}, status=400)
+    return HttpResponseBadRequest('Invalid quantity')
+
+
+def get_food_item(item_id):
+    """Look a food item up in the catalog snapshot, without a query"""
+    food_item = get_catalog().items_by_id.get(item_id)
+    if food_item is None:
+        raise Http404('No FoodItem matches the given query.')
+    return food_item
+
+
+def cart_done(request, cart):
+    """Respond to a cart mutation: JSON for AJAX, a redirect otherwise"""
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        return cart_json(cart)
+    return redirect('view_cart')
+
+
+def add_quantity(cart, food_item, quantity):
+    """Atomically add ``quantity`` of a food item to the cart, up to MAX_QUANTITY"""
+    lines = CartItem.objects.filter(cart=cart, food_item=food_item)
+    added = Least(F('quantity') + quantity, MAX_QUANTITY)
+    if lines.update(quantity=added):
+        return
+    try:
+        with transaction.atomic():
+            CartItem.objects.create(cart=cart, food_item=food_item, quantity=quantity)
+    except IntegrityError:
+        # A concurrent request inserted the line first
+        lines.update(quantity=added)
+
+
+def set_quantities(cart, quantities):
+    """
+    Set the quantity of many cart lines in two statements: one DELETE for the
+    lines dropped to zero and one upsert for the rest.
+    """
+    removed = [pk for pk, quantity in quantities.items() if quantity <= 0]
+    kept = [
+        CartItem(cart=cart, food_item_id=pk, quantity=quantity)
+        for pk, quantity in quantities.items() if quantity > 0
+    ]
+    if removed:
+        CartItem.objects.filter(cart=cart, food_item_id__in=removed).delete()
+    if kept:
+        CartItem.objects.bulk_create(
+            kept,
+            update_conflicts=True,
+            unique_fields=['cart', 'food_item'],
+            update_fields=['quantity'],
+        )
+
+
 def view_cart(request):
     """View shopping cart"""
-    cart = get_user_cart(request.user)
-    subtotal = cart.get_total()
-    delivery_fee = Decimal('50.00')
-    tax = round((subtotal + delivery_fee) * Decimal('0.05'), 2)
-    grand_total = subtotal + delivery_fee + tax
+    if request.user.is_authenticated:
+        cart = get_user_cart(request.user)
+    else:
+        cart = GuestCart(request.session)
+    quote = cart.quote()
     
     context = {
         'cart': cart,
-        'subtotal': subtotal,
-        'delivery_fee': delivery_fee,
-        'tax': tax,
-        'grand_total': grand_total,
-        'item_count': cart.get_item_count(),
+        'items': quote.lines,
+        'subtotal': quote.subtotal,
+        'delivery_fee': quote.delivery_fee,
+        'tax': quote.tax,
+        'grand_total': quote.grand_total,
+        'item_count': quote.item_count,
+        'max_quantity': MAX_QUANTITY,
     }
     return render(request, 'cart.html', context)
 
 
-@login_required(login_url='login')
 @require_http_methods(["POST"])
 def add_to_cart(request, item_id):
     """Add item to cart"""
-    food_item = get_object_or_404(FoodItem, pk=item_id)
-    cart = get_user_cart(request.user)
-    quantity = int(request.POST.get('quantity', 1))
+    food_item = get_food_item(item_id)
+    try:
+        quantity = parse_quantity(request.POST.get('quantity', 1))
+    except (ValueError, TypeError):
+        return invalid_quantity(request)
     
-    cart_item, created = CartItem.objects.get_or_create(
-        cart=cart,
-        food_item=food_item,
-        defaults={'quantity': quantity}
-    )
-    
-    if not created:
-        cart_item.quantity += quantity
-        cart_item.save()
+    if request.user.is_authenticated:
+        with transaction.atomic():
+            cart = get_user_cart(request.user, lock=True)
+            add_quantity(cart, food_item, quantity)
+            cart.refresh_totals()
+    else:
+        cart = GuestCart(request.session)
+        cart.add(food_item.pk, quantity)
     
     messages.success(request, f'{food_item.name} added to cart!')
-    
-    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        return JsonResponse({
-            'success': True,
-            'cart_count': cart.get_item_count(),
-            'cart_total': str(cart.get_total()),
-        })
-    
-    return redirect('view_cart')
+    return cart_done(request, cart)
 
 
-@login_required(login_url='login')
 @require_http_methods(["POST"])
 def remove_from_cart(request, item_id):
     """Remove item from cart"""
-    cart = get_user_cart(request.user)
-    food_item = get_object_or_404(FoodItem, pk=item_id)
-    
-    CartItem.objects.filter(cart=cart, food_item=food_item).delete()
-    messages.success(request, f'{food_item.name} removed from cart!')
+    food_item = get_food_item(item_id)
     
-    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        return JsonResponse({
-            'success': True,
-            'cart_count': cart.get_item_count(),
-            'cart_total': str(cart.get_total()),
-        })
+    if request.user.is_authenticated:
+        with transaction.atomic():
+            cart = get_user_cart(request.user, lock=True)
+            CartItem.objects.filter(cart=cart, food_item=food_item).delete()
+            cart.refresh_totals()
+    else:
+        cart = GuestCart(request.session)
+        cart.remove(food_item.pk)
     
-    return redirect('view_cart')
+    messages.success(request, f'{food_item.name} removed from cart!')
+    return cart_done(request, cart)
 
 
-@login_required(login_url='login')
 @require_http_methods(["POST"])
 def update_cart(request, item_id):
     """Update item quantity in cart"""
-    cart = get_user_cart(request.user)
-    food_item = get_object_or_404(FoodItem, pk=item_id)
-    quantity = int(request.POST.get('quantity', 1))
+    food_item = get_food_item(item_id)
+    try:
+        # Zero removes the line
+        quantity = parse_quantity(request.POST.get('quantity', 1), minimum=0)
+    except (ValueError, TypeError):
+        return invalid_quantity(request)
     
-    if quantity <= 0:
-        CartItem.objects.filter(cart=cart, food_item=food_item).delete()
+    if request.user.is_authenticated:
+        with transaction.atomic():
+            cart = get_user_cart(request.user, lock=True)
+            if quantity <= 0:
+                CartItem.objects.filter(cart=cart, food_item=food_item).delete()
+            else:
+                CartItem.objects.filter(cart=cart, food_item=food_item).update(quantity=quantity)
+            cart.refresh_totals()
     else:
-        cart_item = CartItem.objects.get(cart=cart, food_item=food_item)
-        cart_item.quantity = quantity
-        cart_item.save()
+        cart = GuestCart(request.session)
+        if food_item.pk in cart.quantities:
+            cart.set_quantities({food_item.pk: quantity})
     
     messages.success(request, 'Cart updated!')
+    return cart_done(request, cart)
+
+
+@require_http_methods(["POST"])
+def update_cart_batch(request):
+    """Apply many quantity changes in one transaction - JSON in, JSON out"""
+    try:
+        payload = json.loads(request.body)
+        quantities = {
+            int(pk): parse_quantity(quantity, minimum=0)
+            for pk, quantity in payload['quantities'].items()
+        }
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return JsonResponse({'success': False, 'error': 'Invalid quantities'}, status=400)
     
-    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        return JsonResponse({
-            'success': True,
-            'cart_count': cart.get_item_count(),
-            'cart_total': str(cart.get_total()),
-        })
+    unknown = sorted(set(quantities) - set(get_catalog().items_by_id))
+    if unknown:
+        return JsonResponse({'success': False, 'error': 'Unknown food items', 'items': unknown}, status=400)
     
-    return redirect('view_cart')
+    if request.user.is_authenticated:
+        with transaction.atomic():
+            cart = get_user_cart(request.user, lock=True)
+            set_quantities(cart, quantities)
+            cart.refresh_totals()
+    else:
+        cart = GuestCart(request.session)
+        cart.set_quantities(quantities)
+    quote = cart.quote()
+    
+    return JsonResponse({
+        'success': True,
+        'cart_count': quote.item_count,
+        'cart_total': str(quote.subtotal),
+        'items': {
+            str(line.food_item.pk): {'quantity': line.quantity, 'line_total': str(line.line_total)}
+            for line in quote.lines
+        },
+        'delivery_fee': str(quote.delivery_fee),
+        'tax': str(quote.tax),
+        'grand_total': str(quote.grand_total),
+    })
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def quote_api(request):
+    """
+    Price one or many carts in one call - JSON in, JSON out. Send
+    ``{"items": [...]}`` for one quote or ``{"carts": [{"id": ..., "items": [...]}]}``
+    for many; items are ``{"id": 1, "quantity": 2}`` or ``[1, 2]``. Quoting has
+    no side effects, so the endpoint is open to the mobile client without CSRF.
+    """
+    try:
+        payload = json.loads(request.body)
+        if not isinstance(payload, dict):
+            raise PricingError('Expected a JSON object')
+        carts = payload.get('carts')
+        if carts is None:
+            carts = [{'items': payload.get('items')}]
+        elif not isinstance(carts, list) or not all(isinstance(cart, dict) for cart in carts):
+            raise PricingError('"carts" must be a list of objects')
+        if len(carts) > MAX_QUOTE_CARTS:
+            raise PricingError(f'At most {MAX_QUOTE_CARTS} carts per request')
+        requested = [(cart.get('id'), parse_items(cart.get('items'))) for cart in carts]
+        if sum(len(pairs) for cart_id, pairs in requested) > MAX_QUOTE_LINES:
+            raise PricingError(f'At most {MAX_QUOTE_LINES} items per request')
+        catalog = get_catalog()
+        quotes = [dict(pricing.quote(pairs, catalog).to_dict(), id=cart_id) for cart_id, pairs in requested]
+    except ValueError as exc:  # Includes PricingError and malformed JSON
+        return JsonResponse({'success': False, 'error': str(exc)}, status=400)
+    
+    if 'carts' in payload:
+        return JsonResponse({'success': True, 'quotes': quotes})
+    quotes[0].pop('id')
+    return JsonResponse({'success': True, 'quote': quotes[0]})
 
 
-@login_required(login_url='login')
 @require_http_methods(["POST"])
 def clear_cart(request):
     """Clear entire cart"""
-    cart = get_user_cart(request.user)
-    CartItem.objects.filter(cart=cart).delete()
+    if request.user.is_authenticated:
+        with transaction.atomic():
+            cart = get_user_cart(request.user, lock=True)
+            CartItem.objects.filter(cart=cart).delete()
+            cart.refresh_totals()
+    else:
+        GuestCart(request.session).clear()
     messages.success(request, 'Cart cleared!')
     return redirect('view_cart')
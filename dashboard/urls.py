@@ -7,6 +7,8 @@ urlpatterns = [
     path('food/edit/<int:food_id>/', views.edit_food, name='edit_food'),
     path('food/delete/<int:food_id>/', views.delete_food, name='delete_food'),
     path('orders/', views.manage_orders, name='manage_orders'),
+    path('orders/events/', views.order_events, name='staff_order_events'),
+    path('kitchen/', views.kitchen_queue, name='kitchen_queue'),
     path('orders/<str:order_number>/update/', views.update_order_status, name='update_order_status'),
     path('reservations/', views.manage_reservations, name='manage_reservations'),
     path('analytics/', views.analytics, name='analytics'),
@@ -1,14 +1,21 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import user_passes_test, login_required
 from django.contrib import messages
+from django.core.exceptions import ImproperlyConfigured
 from django.views.decorators.http import require_http_methods
+from django.http import JsonResponse
 from django.db.models import Sum, Count, Q
 from django.utils import timezone
 from datetime import timedelta
 
 from menu.models import FoodItem, Category
+from menu.fragments import card_cache
+from orders import archive, kitchen
+from orders.events import STAFF_CHANNEL, event_stream_response
 from orders.models import Order, OrderItem
+from orders.status import TRANSITIONS, InvalidTransition, StaleOrder, transition
 from booking.models import Reservation
+from payments.gateway import get_gateway
 from payments.models import Payment
 from django.contrib.auth.models import User
 
@@ -22,9 +29,10 @@ def is_admin(user):
 @user_passes_test(is_admin, login_url='home')
 def dashboard(request):
     """Admin dashboard"""
-    # Get statistics
-    total_orders = Order.objects.count()
-    total_revenue = Payment.objects.filter(status='completed').aggregate(Sum('amount'))['amount__sum'] or 0
+    # Get statistics; archived orders (orders.archive) come from their totals
+    archived_orders, archived_revenue = archive.stats()
+    total_orders = Order.objects.count() + sum(archived_orders.values())
+    total_revenue = (Payment.objects.filter(status='completed').aggregate(Sum('amount'))['amount__sum'] or 0) + archived_revenue
     total_users = User.objects.count()
     pending_orders = Order.objects.filter(status='pending').count()
     
@@ -136,10 +144,31 @@ def manage_orders(request):
     context = {
         'orders': orders,
         'status': status,
+        # Lets the live updates rebuild each row's status menu
+        'status_flow': {
+            'choices': Order.STATUS_CHOICES,
+            'transitions': {value: sorted(targets) for value, targets in TRANSITIONS.items()},
+        },
     }
     return render(request, 'dashboard/manage_orders.html', context)
 
 
+@login_required(login_url='login')
+@user_passes_test(is_admin, login_url='home')
+@require_http_methods(["GET"])
+def kitchen_queue(request):
+    """Active orders in cooking order, for the kitchen display - JSON"""
+    return JsonResponse(kitchen.get_queue().to_dict())
+
+
+@login_required(login_url='login')
+@user_passes_test(is_admin, login_url='home')
+@require_http_methods(["GET"])
+async def order_events(request):
+    """Server-Sent Events stream of every order's status changes"""
+    return event_stream_response(request, STAFF_CHANNEL)
+
+
 @login_required(login_url='login')
 @user_passes_test(is_admin, login_url='home')
 @require_http_methods(["GET", "POST"])
@@ -150,17 +179,24 @@ def update_order_status(request, order_number):
     if request.method == 'POST':
         new_status = request.POST.get('status')
         
-        if new_status in dict(Order.STATUS_CHOICES):
-            order.status = new_status
-            order.save()
-            messages.success(request, 'Order status updated!')
+        if new_status in dict(Order.STATUS_CHOICES) and new_status != order.status:
+            # Write against the version the form was rendered from, so a
+            # change made since then is not overwritten
+            try:
+                order.version = int(request.POST.get('version', order.version))
+                transition(order, new_status, actor=request.user)
+                messages.success(request, 'Order status updated!')
+            except InvalidTransition as exc:
+                messages.error(request, str(exc))
+            except (StaleOrder, ValueError):
+                messages.error(request, f'Order {order.order_number} changed since you loaded it. Please review it and try again.')
         
         return redirect('manage_orders')
     
     # GET request - show form to update status
     context = {
         'order': order,
-        'status_choices': Order.STATUS_CHOICES,
+        'status_choices': order.status_options(),
     }
     return render(request, 'dashboard/update_order_status.html', context)
 
@@ -187,24 +223,30 @@ def manage_reservations(request):
 @user_passes_test(is_admin, login_url='home')
 def analytics(request):
     """View analytics and reports"""
+    # Archived orders (orders.archive) count through their running totals
+    archived_orders, archived_revenue = archive.stats()
+    
     # Revenue analytics
-    total_revenue = Payment.objects.filter(status='completed').aggregate(Sum('amount'))['amount__sum'] or 0
+    total_revenue = (Payment.objects.filter(status='completed').aggregate(Sum('amount'))['amount__sum'] or 0) + archived_revenue
     today_revenue = Payment.objects.filter(
         status='completed',
         created_at__date=timezone.now().date()
     ).aggregate(Sum('amount'))['amount__sum'] or 0
     
     # Order analytics
-    total_orders = Order.objects.count()
-    completed_orders = Order.objects.filter(status='delivered').count()
-    cancelled_orders = Order.objects.filter(status='cancelled').count()
-    
-    # Popular items
-    popular_items = OrderItem.objects.values('food_item__name').annotate(
-        total_quantity=Sum('quantity')
-    ).order_by('-total_quantity')[:10]
-    # Convert to list and compute popularity percent for progress bars
-    popular_list = list(popular_items)
+    total_orders = Order.objects.count() + sum(archived_orders.values())
+    completed_orders = Order.objects.filter(status='delivered').count() + archived_orders.get('delivered', 0)
+    cancelled_orders = Order.objects.filter(status='cancelled').count() + archived_orders.get('cancelled', 0)
+    
+    # Popular items, recent and archived
+    quantities = archive.item_totals()
+    for row in OrderItem.objects.values('food_item__name').annotate(total_quantity=Sum('quantity')):
+        quantities[row['food_item__name']] += row['total_quantity']
+    popular_list = [
+        {'food_item__name': name, 'total_quantity': quantity}
+        for name, quantity in sorted(quantities.items(), key=lambda pair: pair[1], reverse=True)[:10]
+    ]
+    # Compute popularity percent for progress bars
     max_qty = max((item['total_quantity'] for item in popular_list), default=0)
     for item in popular_list:
         if max_qty > 0:
@@ -212,6 +254,12 @@ def analytics(request):
             item['popularity_percent'] = min(100, round((item['total_quantity'] / max_qty) * 100))
         else:
             item['popularity_percent'] = 0
+    
+    # Payment gateway calls made by this worker
+    try:
+        gateway = get_gateway().metrics.stats()
+    except ImproperlyConfigured:
+        gateway = None
 
     context = {
         'total_revenue': total_revenue,
@@ -220,6 +268,8 @@ def analytics(request):
         'completed_orders': completed_orders,
         'cancelled_orders': cancelled_orders,
         'popular_items': popular_list,
+        'card_cache': card_cache.stats(),
+        'gateway': gateway,
     }
     return render(request, 'dashboard/analytics.html', context)
 
@@ -15,6 +15,6 @@ class FoodItemAdmin(admin.ModelAdmin):
     search_fields = ['name', 'description']
     fieldsets = (
         ('Basic Info', {'fields': ('name', 'category', 'description')}),
-        ('Pricing & Availability', {'fields': ('price', 'available')}),
+        ('Pricing & Availability', {'fields': ('price', 'available', 'prep_minutes')}),
         ('Media', {'fields': ('image',)}),
     )
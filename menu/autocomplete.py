@@ -0,0 +1,123 @@
+"""
+In-memory autocomplete for the live search box.
+
+Every available food item is tokenised (name, category and description words)
+into a prefix table, and its JSON fragment for search_api is rendered once.
+The index follows the catalog snapshot: when a different snapshot comes in
+(a new version, or a writer's uncommitted one) only the items that were
+added, edited, toggled or deleted are re-indexed.
+"""
+import heapq
+import json
+import threading
+from collections import defaultdict
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .catalog import get_catalog
+from .images import best_url
+from .search import search_terms
+
+# Longest indexed prefix; longer query terms are checked against the tokens
+MAX_PREFIX_LENGTH = 20
+
+
+class _Entry:
+    __slots__ = ('stamp', 'tokens', 'name_tokens', 'order_key', 'fragment')
+
+    def __init__(self, item):
+        self.stamp = (item.updated_at, item.category.name)
+        self.name_tokens = frozenset(search_terms(item.name))
+        self.tokens = self.name_tokens | frozenset(
+            search_terms(item.category.name) + search_terms(item.description)
+        )
+        # Same order as the catalog: newest first
+        self.order_key = (-item.created_at.timestamp(), item.pk)
+        self.fragment = json.dumps({
+            'id': item.pk,
+            'name': item.name,
+            'price': item.price,
+            'image': item.image.name,
+            'thumbnail': best_url(item, 'thumb') if item.image else None,
+        }, cls=DjangoJSONEncoder)
+
+
+def _matches(tokens, term):
+    return any(token.startswith(term) for token in tokens)
+
+
+class AutocompleteIndex:
+    """Prefix index over the available items of one catalog snapshot"""
+
+    def __init__(self):
+        self.catalog = None
+        self._entries = {}
+        self._prefixes = defaultdict(set)
+
+    def _add(self, pk, entry):
+        self._entries[pk] = entry
+        for token in entry.tokens:
+            for end in range(1, min(len(token), MAX_PREFIX_LENGTH) + 1):
+                self._prefixes[token[:end]].add(pk)
+
+    def _remove(self, pk):
+        entry = self._entries.pop(pk)
+        for token in entry.tokens:
+            for end in range(1, min(len(token), MAX_PREFIX_LENGTH) + 1):
+                prefix = token[:end]
+                ids = self._prefixes[prefix]
+                ids.discard(pk)
+                if not ids:
+                    del self._prefixes[prefix]
+
+    def sync(self, catalog):
+        """Bring the index up to date with a catalog snapshot"""
+        if catalog is self.catalog:
+            return
+        current = {item.pk: item for item in catalog.available}
+        for pk in [pk for pk in self._entries if pk not in current]:
+            self._remove(pk)
+        for pk, item in current.items():
+            entry = self._entries.get(pk)
+            if entry is None or entry.stamp != (item.updated_at, item.category.name):
+                if entry is not None:
+                    self._remove(pk)
+                self._add(pk, _Entry(item))
+        self.catalog = catalog
+
+    def suggest(self, query, limit):
+        """Return the JSON fragments of the best ``limit`` matches"""
+        terms = search_terms(query)
+        if not terms:
+            return []
+
+        candidates = None
+        for term in sorted(terms, key=len, reverse=True):
+            ids = self._prefixes.get(term[:MAX_PREFIX_LENGTH])
+            if not ids:
+                return []
+            if len(term) > MAX_PREFIX_LENGTH:
+                ids = {pk for pk in ids if _matches(self._entries[pk].tokens, term)}
+            candidates = set(ids) if candidates is None else candidates & ids
+            if not candidates:
+                return []
+
+        def rank(pk):
+            entry = self._entries[pk]
+            name_hits = sum(1 for term in terms if _matches(entry.name_tokens, term))
+            return (-name_hits, entry.order_key)
+
+        best = heapq.nsmallest(limit, candidates, key=rank)
+        return [self._entries[pk].fragment for pk in best]
+
+
+_index = AutocompleteIndex()
+_lock = threading.Lock()
+
+
+def suggest(query, limit):
+    """Autocomplete ``query`` against the current catalog"""
+    catalog = get_catalog()
+    with _lock:
+        _index.sync(catalog)
+        return _index.suggest(query, limit)
@@ -0,0 +1,152 @@
+"""
+In-process catalog snapshot.
+
+Menu pages read food items and categories from an immutable snapshot that is
+built once per worker. A version stamp kept in the shared cache is bumped by
+the save/delete signals in menu.signals, and each worker rebuilds its snapshot
+lazily the next time it sees a different stamp.
+
+The stamp only changes once the writing transaction commits, so until then
+the writer's own connection is served a private snapshot, built after its
+last write and held by the pending bump. It is dropped with the bump if the
+transaction rolls back, and never replaces the shared snapshot.
+"""
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from types import MappingProxyType
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import FoodItem, Category
+
+VERSION_CACHE_KEY = 'menu:catalog:version'
+FEATURED_COUNT = 6
+
+_snapshot = None
+_lock = threading.Lock()
+
+
+class CatalogSnapshot:
+    """Read-only view of the whole menu at one catalog version"""
+
+    def __init__(self, version, items, categories):
+        self.version = version
+        self.categories = tuple(categories)
+        self.categories_by_id = MappingProxyType({c.pk: c for c in self.categories})
+
+        for item in items:
+            # Share one Category instance per category instead of a join
+            item.category = self.categories_by_id[item.category_id]
+        self.items = tuple(items)
+        self.items_by_id = MappingProxyType({item.pk: item for item in self.items})
+        self.available = tuple(item for item in self.items if item.available)
+
+        by_category = {c.pk: [] for c in self.categories}
+        for item in self.available:
+            by_category[item.category_id].append(item)
+        self.items_by_category = MappingProxyType(
+            {pk: tuple(category_items) for pk, category_items in by_category.items()}
+        )
+
+        self.featured = self.available[:FEATURED_COUNT]
+        self.count = len(self.items)
+        # Category edits and deletions don't show up in updated_at, so the
+        # time of the last version bump counts as a modification too
+        modified = [item.updated_at for item in self.items]
+        changed_at = version_time(version)
+        if changed_at is not None:
+            modified.append(changed_at)
+        self.last_modified = max(modified, default=None)
+        self.etag = '%s-%d-%s' % (
+            version, self.count,
+            self.last_modified.timestamp() if self.last_modified else 0,
+        )
+
+
+def new_version():
+    """Return a fresh version stamp: the current time plus a random suffix"""
+    return f'{time.time():.6f}:{uuid.uuid4().hex[:8]}'
+
+
+def version_time(version):
+    """Return when a version stamp was issued, or None if it has no time"""
+    try:
+        return datetime.fromtimestamp(float(version.split(':')[0]), tz=timezone.utc)
+    except (ValueError, OverflowError):
+        return None
+
+
+def current_version():
+    """Return the shared catalog version stamp, creating one if missing"""
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(VERSION_CACHE_KEY, new_version(), timeout=None)
+        version = cache.get(VERSION_CACHE_KEY)
+    return version
+
+
+class VersionBump:
+    """
+    The on_commit callback of one catalog write. While it is pending it
+    also holds the snapshot the writing transaction reads.
+    """
+
+    def __init__(self):
+        self.snapshot = None
+
+    def __call__(self):
+        cache.set(VERSION_CACHE_KEY, new_version(), timeout=None)
+
+
+def bump_version():
+    """Invalidate every worker's snapshot once the current transaction commits"""
+    transaction.on_commit(VersionBump())
+
+
+def pending_bump():
+    """The latest uncommitted catalog write on this connection, if any"""
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        return None
+    # Rolled-back savepoints take their callbacks with them, so whatever is
+    # still queued here was written by this transaction and not yet committed
+    for _, callback, _ in reversed(connection.run_on_commit):
+        if isinstance(callback, VersionBump):
+            return callback
+    return None
+
+
+def build_snapshot(version):
+    """Load the catalog from the database"""
+    categories = list(Category.objects.all())
+    items = list(FoodItem.objects.all())
+    return CatalogSnapshot(version, items, categories)
+
+
+def get_catalog():
+    """Return the snapshot for the current version, rebuilding it if stale"""
+    global _snapshot
+    # Read the stamp before loading so a concurrent bump forces another rebuild
+    version = current_version()
+    bump = pending_bump()
+    if bump is not None:
+        if bump.snapshot is None or bump.snapshot.version != version:
+            bump.snapshot = build_snapshot(version)
+        return bump.snapshot
+    snapshot = _snapshot
+    if snapshot is None or snapshot.version != version:
+        with _lock:
+            snapshot = _snapshot
+            if snapshot is None or snapshot.version != version:
+                snapshot = _snapshot = build_snapshot(version)
+    return snapshot
+
+
+def reset():
+    """Forget this worker's snapshot, e.g. between tests"""
+    global _snapshot
+    with _lock:
+        _snapshot = None
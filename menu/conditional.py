@@ -0,0 +1,89 @@
+"""
+Conditional GET for catalog pages.
+
+The validators come from the catalog snapshot (version stamp, row count and
+latest modification), so answering ``If-None-Match``/``If-Modified-Since``
+with a 304 costs no queries and no template rendering. Item pages also show
+stored recommendations, so their validators include the recommendations
+version stamp as well.
+"""
+from functools import wraps
+
+from django.contrib import messages
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from cart.guest import SESSION_KEY as GUEST_CART_SESSION_KEY
+from . import recommendations
+from .catalog import get_catalog, version_time
+
+
+def _page_is_shared(request):
+    """
+    Whether the page is the same for every visitor. Logged-in users see their
+    name and cart in the navbar, guests with a cart see its count, and flash
+    messages are shown only once.
+    """
+    if request.user.is_authenticated or request.session.get(GUEST_CART_SESSION_KEY):
+        return False
+    return not len(messages.get_messages(request))
+
+
+def catalog_etag(request, *args, **kwargs):
+    return get_catalog().etag
+
+
+def catalog_last_modified(request, *args, **kwargs):
+    return get_catalog().last_modified
+
+
+def page_etag(request, *args, **kwargs):
+    if not _page_is_shared(request):
+        return None
+    return 'page-' + get_catalog().etag
+
+
+def page_last_modified(request, *args, **kwargs):
+    if not _page_is_shared(request):
+        return None
+    return get_catalog().last_modified
+
+
+def item_page_etag(request, *args, **kwargs):
+    etag = page_etag(request)
+    if etag is None:
+        return None
+    return f'{etag}-{recommendations.current_version()}'
+
+
+def item_page_last_modified(request, *args, **kwargs):
+    modified = page_last_modified(request)
+    built = version_time(recommendations.current_version())
+    if modified is None or built is None:
+        return modified
+    return max(modified, built)
+
+
+def _revalidate(view_func):
+    """Make browsers check back with the server before reusing a response"""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        response = view_func(request, *args, **kwargs)
+        patch_cache_control(response, no_cache=True)
+        return response
+    return wrapper
+
+
+def catalog_page_condition(view_func):
+    """Conditional GET for HTML pages built from the catalog"""
+    return _revalidate(condition(etag_func=page_etag, last_modified_func=page_last_modified)(view_func))
+
+
+def item_page_condition(view_func):
+    """Conditional GET for item pages, built from the catalog and recommendations"""
+    return _revalidate(condition(etag_func=item_page_etag, last_modified_func=item_page_last_modified)(view_func))
+
+
+def catalog_api_condition(view_func):
+    """Conditional GET for JSON endpoints that only depend on the catalog"""
+    return _revalidate(condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified)(view_func))
@@ -0,0 +1,82 @@
+"""
+Per-item HTML fragment cache for menu cards.
+
+Each worker keeps a bounded LRU of rendered cards. Keys include the item's
+``updated_at`` (and category name), so an edit made in another worker is never
+served stale; the saving worker also evicts the item's fragments right away
+through menu.signals.
+"""
+import threading
+from collections import OrderedDict
+
+from django.template.loader import render_to_string
+
+MAX_FRAGMENTS = 2000
+
+CARD_TEMPLATES = {
+    'menu': 'partials/menu_card.html',
+    'home': 'partials/home_card.html',
+}
+
+
+class FragmentCache:
+    """Thread-safe LRU of rendered fragments with hit/miss counters"""
+
+    def __init__(self, max_entries=MAX_FRAGMENTS):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            html = self._entries.get(key)
+            if html is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return html
+
+    def set(self, key, html):
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def evict(self, item_id):
+        """Drop every fragment of one food item"""
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == item_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': sum(len(html) for html in self._entries.values()),
+                'hit_rate': round(100 * self.hits / lookups, 1) if lookups else 0,
+            }
+
+
+card_cache = FragmentCache()
+
+
+def render_card(item, variant):
+    """Return the card HTML of ``item``, rendering it only on a cache miss"""
+    key = (variant, item.pk, item.updated_at, item.category.name)
+    html = card_cache.get(key)
+    if html is None:
+        html = render_to_string(CARD_TEMPLATES[variant], {'item': item})
+        card_cache.set(key, html)
+    return html
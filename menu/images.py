@@ -0,0 +1,174 @@
+"""
+Resized image variants of FoodItem.image.
+
+When a food item is saved with a new image, the original is handed to a
+process pool that writes downscaled AVIF (when Pillow supports it), WebP and
+JPEG copies next to it under ``menu_items/variants/``. File names embed a hash
+of the original's bytes, so variant URLs never change meaning and a cached copy
+is never stale. The names are stored in ``FoodItem.image_variants`` and templates
+render them through the ``food_image`` tag in menu.templatetags.menu_tags.
+
+Run ``python manage.py build_image_variants`` to backfill existing items.
+
+The pool workers only run ``render_variants``, which touches Pillow and the
+file system but no models, so this module must not import models at the top.
+"""
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from PIL import Image, ImageOps, features
+
+logger = logging.getLogger(__name__)
+
+VARIANTS_DIR = 'menu_items/variants'
+
+# Rendered widths of each size, 1x and 2x
+SIZES = {
+    'thumb': (160, 320),
+    'card': (480, 960),
+}
+
+# Best format first; JPEG is the fallback every browser can show
+FORMATS = [
+    ('avif', 'image/avif', 'AVIF', {'quality': 55}),
+    ('webp', 'image/webp', 'WEBP', {'quality': 78, 'method': 6}),
+    ('jpg', 'image/jpeg', 'JPEG', {'quality': 80, 'optimize': True, 'progressive': True}),
+]
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def available_formats():
+    """Output formats this Pillow build can encode"""
+    return [fmt for fmt in FORMATS if fmt[0] != 'avif' or features.check('avif')]
+
+
+def content_hash(path):
+    """Short SHA-256 digest of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def _save(image, path, pil_format, options):
+    """Write ``image`` to ``path`` atomically"""
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    image.save(tmp_path, pil_format, **options)
+    os.replace(tmp_path, path)
+
+
+def render_variants(source_path, media_root):
+    """
+    Write every size and format of the image at ``source_path`` and return
+    ``{'width', 'height', 'sizes': {size: {ext: [[width, name], ...]}}}``
+    with names relative to ``media_root``. Runs inside the process pool.
+    """
+    digest = content_hash(source_path)
+    output_dir = os.path.join(media_root, VARIANTS_DIR)
+    os.makedirs(output_dir, exist_ok=True)
+
+    with Image.open(source_path) as original:
+        image = ImageOps.exif_transpose(original).convert('RGB')
+    variants = {'width': image.width, 'height': image.height, 'sizes': {}}
+
+    for size, widths in SIZES.items():
+        # Never upscale; a small original still gets one variant per format
+        targets = sorted({min(width, image.width) for width in widths})
+        formats = variants['sizes'][size] = {}
+        for width in targets:
+            height = max(1, round(image.height * width / image.width))
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            for ext, mime, pil_format, options in available_formats():
+                name = f'{VARIANTS_DIR}/{digest}-{width}w.{ext}'
+                path = os.path.join(media_root, name)
+                if not os.path.exists(path):
+                    _save(resized, path, pil_format, options)
+                formats.setdefault(ext, []).append([width, name])
+    return variants
+
+
+def get_executor():
+    """Return the shared process pool, starting it on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=getattr(settings, 'IMAGE_VARIANT_WORKERS', 2),
+                # Don't fork a process that holds database connections and threads
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _executor
+
+
+def needs_variants(item):
+    """True if ``item`` has an image whose variants have not been stored"""
+    return bool(item.image) and item.image_variants.get('source') != item.image.name
+
+
+def submit(item):
+    """Render ``item``'s variants in the background and store them when done"""
+    source = item.image.name
+    future = get_executor().submit(render_variants, item.image.path, settings.MEDIA_ROOT)
+    future.add_done_callback(partial(_store_result, item.pk, source))
+    return future
+
+
+def _store_result(pk, source, future):
+    from django.db import connection
+
+    try:
+        store_variants(pk, source, future.result())
+    except Exception:
+        logger.exception('Could not build image variants of food item %s (%s)', pk, source)
+    finally:
+        # Callbacks run on the pool's management thread, which Django
+        # doesn't clean up after
+        connection.close()
+
+
+def store_variants(pk, source, variants):
+    """Record the variants of ``source`` unless the item's image has changed since"""
+    from django.utils import timezone
+
+    from . import catalog
+    from .models import FoodItem
+
+    variants = dict(variants, source=source)
+    # update() skips the save signals; bumping updated_at and the catalog
+    # version refreshes cached cards and snapshots instead
+    updated = FoodItem.objects.filter(pk=pk, image=source).update(
+        image_variants=variants, updated_at=timezone.now(),
+    )
+    if updated:
+        catalog.bump_version()
+    return updated
+
+
+def best_url(item, size):
+    """URL of the smallest JPEG variant of ``size``, or of the original image"""
+    jpegs = item.image_variants.get('sizes', {}).get(size, {}).get('jpg')
+    if jpegs and item.image_variants.get('source') == item.image.name:
+        return settings.MEDIA_URL + jpegs[0][1]
+    return item.image.url
+
+
+def picture_sources(item, size):
+    """``(type, srcset)`` pairs for the <source> elements of a <picture>"""
+    if item.image_variants.get('source') != item.image.name:
+        return []
+    formats = item.image_variants.get('sizes', {}).get(size, {})
+    sources = []
+    for ext, mime, pil_format, options in FORMATS:
+        if ext in formats:
+            srcset = ', '.join(f'{settings.MEDIA_URL}{name} {width}w' for width, name in formats[ext])
+            sources.append((mime, srcset))
+    return sources
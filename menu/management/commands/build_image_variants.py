@@ -0,0 +1,34 @@
+from concurrent.futures import as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from menu import images
+from menu.models import FoodItem
+
+
+class Command(BaseCommand):
+    help = 'Build the resized image variants of food items'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Rebuild every item, not only those missing variants')
+
+    def handle(self, *args, **options):
+        items = [
+            item for item in FoodItem.objects.exclude(image='')
+            if options['all'] or images.needs_variants(item)
+        ]
+        executor = images.get_executor()
+        futures = {
+            executor.submit(images.render_variants, item.image.path, settings.MEDIA_ROOT): item
+            for item in items
+        }
+        stored = 0
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                stored += images.store_variants(item.pk, item.image.name, future.result())
+            except Exception as exc:
+                self.stderr.write(f'{item.name}: {exc}')
+        self.stdout.write(self.style.SUCCESS(f'Built image variants of {stored} food items.'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from menu.recommendations import build_recommendations, TOP_K
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the "frequently bought together" recommendations from order history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=TOP_K,
+                            help=f'Neighbours to keep per food item (default {TOP_K})')
+
+    def handle(self, *args, **options):
+        count = build_recommendations(top_k=options['top_k'])
+        self.stdout.write(self.style.SUCCESS(f'Stored {count} recommendations.'))
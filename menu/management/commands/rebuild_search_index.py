@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from menu import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index of the menu'
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            self.stdout.write(self.style.WARNING(
+                'This database has no full-text search table; search falls back to LIKE queries.'
+            ))
+            return
+        with transaction.atomic():
+            count = search.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} food items.'))
@@ -0,0 +1,58 @@
+# Generated by Django 6.0.2 on 2026-10-18 17:42
+
+from django.db import migrations
+
+# Frozen copy of the table menu.search created at the time of this migration;
+# later changes to that module must come with their own migration.
+SEARCH_TABLE = 'menu_fooditem_fts'
+
+SQLITE_CREATE_SQL = [
+    f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+    "name, description, category, available UNINDEXED, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '1 2 3')",
+]
+MYSQL_CREATE_SQL = [
+    f'CREATE TABLE {SEARCH_TABLE} ('
+    'id BIGINT NOT NULL PRIMARY KEY, '
+    'name VARCHAR(100) NOT NULL, '
+    'description LONGTEXT NOT NULL, '
+    'category VARCHAR(50) NOT NULL, '
+    'available BOOL NOT NULL, '
+    'FULLTEXT KEY menu_fts_name (name), '
+    'FULLTEXT KEY menu_fts_all (name, description, category)'
+    ') ENGINE=InnoDB',
+]
+
+
+def create_search_table(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor not in ('sqlite', 'mysql'):
+        return
+    key = 'rowid' if connection.vendor == 'sqlite' else 'id'
+    with connection.cursor() as cursor:
+        for sql in SQLITE_CREATE_SQL if connection.vendor == 'sqlite' else MYSQL_CREATE_SQL:
+            cursor.execute(sql)
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} ({key}, name, description, category, available) '
+            'SELECT f.id, f.name, f.description, c.name, f.available '
+            'FROM menu_fooditem f INNER JOIN menu_category c ON c.id = f.category_id'
+        )
+
+
+def drop_search_table(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor not in ('sqlite', 'mysql'):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
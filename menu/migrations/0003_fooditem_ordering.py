@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-18 17:42
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0002_fooditem_search_index'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='fooditem',
+            options={'ordering': ['-created_at', 'id']},
+        ),
+    ]
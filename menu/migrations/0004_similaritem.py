@@ -0,0 +1,29 @@
+# Generated by Django 6.0.2 on 2026-10-18 17:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0003_fooditem_ordering'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('orders', models.PositiveIntegerField()),
+                ('food_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_items', to='menu.fooditem')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='menu.fooditem')),
+            ],
+            options={
+                'ordering': ['food_item', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('food_item', 'rank'), name='menu_similaritem_item_rank')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-18 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0004_similaritem'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='fooditem',
+            index=models.Index(fields=['available', 'category', '-created_at'], name='menu_food_avail_cat_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 21:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0006_fooditem_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fooditem',
+            name='prep_minutes',
+            field=models.PositiveSmallIntegerField(default=10, help_text='Typical cooking time of one portion'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.2 on 2026-10-18 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0007_fooditem_prep_minutes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='fooditem',
+            name='menu_food_avail_cat_idx',
+        ),
+        migrations.AddIndex(
+            model_name='fooditem',
+            index=models.Index(fields=['category', '-created_at', 'id', 'available'], name='menu_food_cat_created_idx'),
+        ),
+    ]
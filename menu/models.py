@@ -20,12 +20,35 @@ class FoodItem(models.Model):
     description = models.TextField()
     price = models.DecimalField(max_digits=8, decimal_places=2, validators=[MinValueValidator(0)])
     image = models.ImageField(upload_to='menu_items/')
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)  # See menu.images
     available = models.BooleanField(default=True)
+    prep_minutes = models.PositiveSmallIntegerField(default=10, help_text='Typical cooking time of one portion')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', 'id']
+        indexes = [
+            models.Index(fields=['category', '-created_at', 'id', 'available'], name='menu_food_cat_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} - Rs. {self.price}"
+
+
+class SimilarItem(models.Model):
+    """Precomputed "frequently bought together" neighbours of a food item"""
+    food_item = models.ForeignKey(FoodItem, on_delete=models.CASCADE, related_name='similar_items')
+    similar = models.ForeignKey(FoodItem, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    orders = models.PositiveIntegerField()  # Orders containing both items
+    
+    class Meta:
+        ordering = ['food_item', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['food_item', 'rank'], name='menu_similaritem_item_rank'),
+        ]
+    
+    def __str__(self):
+        return f"{self.food_item_id} -> {self.similar_id} (#{self.rank})"
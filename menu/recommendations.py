@@ -0,0 +1,119 @@
+"""
+"Frequently bought together" recommendations.
+
+Item-to-item co-occurrence counts are computed from order history with NumPy:
+the (order, item) incidence matrix is kept in sparse coordinate form, every
+pair of items sharing an order is expanded with vectorised index arithmetic,
+and the pairs are counted with ``np.unique``. Scores are cosine similarities
+(pair count over the geometric mean of the two items' order counts), and the
+top-K neighbours of each item are stored in ``SimilarItem``.
+
+Run ``python manage.py build_recommendations`` from cron to refresh them.
+Each rebuild bumps a version stamp in the shared cache, which item pages
+fold into their ETag (menu.conditional).
+"""
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+
+from .catalog import new_version
+from .models import SimilarItem
+
+TOP_K = 8
+VERSION_CACHE_KEY = 'menu:recommendations:version'
+
+
+def current_version():
+    """Return the stamp of the stored recommendations, creating one if missing"""
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(VERSION_CACHE_KEY, new_version(), timeout=None)
+        version = cache.get(VERSION_CACHE_KEY)
+    return version
+
+
+def bump_version():
+    """Give the recommendations a new stamp once the current transaction commits"""
+    transaction.on_commit(
+        lambda: cache.set(VERSION_CACHE_KEY, new_version(), timeout=None)
+    )
+
+
+def co_purchase_neighbours(order_ids, item_ids, top_k=TOP_K):
+    """
+    Return ``(item, neighbour, score, count)`` arrays holding the ``top_k``
+    best neighbours of every item, best first within each item.
+    """
+    order_ids = np.asarray(order_ids, dtype=np.int64)
+    item_ids = np.asarray(item_ids, dtype=np.int64)
+    empty = (np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0), np.empty(0, np.int64))
+    if not len(item_ids):
+        return empty
+
+    # Compact ids to 0..n-1 and drop repeated (order, item) rows
+    items, item_index = np.unique(item_ids, return_inverse=True)
+    _, order_index = np.unique(order_ids, return_inverse=True)
+    n = len(items)
+    cells = np.unique(order_index * n + item_index)
+    row_order, row_item = cells // n, cells % n
+
+    # Rows are sorted by order; find where each order's rows start
+    starts = np.flatnonzero(np.r_[True, row_order[1:] != row_order[:-1]])
+    sizes = np.diff(np.r_[starts, len(cells)])
+    row_size = np.repeat(sizes, sizes)
+    row_start = np.repeat(starts, sizes)
+
+    # Pair every row with every row of the same order (itself excluded)
+    left = np.repeat(np.arange(len(cells)), row_size)
+    offset = np.arange(len(left)) - np.repeat(np.cumsum(row_size) - row_size, row_size)
+    right = np.repeat(row_start, row_size) + offset
+    distinct = left != right
+    if not distinct.any():
+        return empty
+    pair_codes, counts = np.unique(
+        row_item[left[distinct]] * n + row_item[right[distinct]], return_counts=True
+    )
+    src, dst = pair_codes // n, pair_codes % n
+
+    frequency = np.bincount(row_item, minlength=n)
+    scores = counts / np.sqrt(frequency[src] * frequency[dst])
+
+    # Best first within each item, then keep the first top_k of every group
+    ranking = np.lexsort((dst, -counts, -scores, src))
+    src, dst, scores, counts = src[ranking], dst[ranking], scores[ranking], counts[ranking]
+    group_starts = np.flatnonzero(np.r_[True, src[1:] != src[:-1]])
+    group_sizes = np.diff(np.r_[group_starts, len(src)])
+    rank = np.arange(len(src)) - np.repeat(group_starts, group_sizes)
+    keep = rank < top_k
+    return items[src[keep]], items[dst[keep]], scores[keep], counts[keep]
+
+
+def build_recommendations(top_k=TOP_K):
+    """Recompute every item's neighbours and return how many rows were stored"""
+    from orders.models import OrderItem
+
+    pairs = np.array(
+        OrderItem.objects.exclude(order__status='cancelled')
+        .values_list('order_id', 'food_item_id')
+        .order_by(),
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    src, dst, scores, counts = co_purchase_neighbours(pairs[:, 0], pairs[:, 1], top_k)
+
+    rows = []
+    rank = 0
+    for i in range(len(src)):
+        rank = rank + 1 if i and src[i] == src[i - 1] else 0
+        rows.append(SimilarItem(
+            food_item_id=int(src[i]),
+            similar_id=int(dst[i]),
+            rank=rank,
+            score=float(scores[i]),
+            orders=int(counts[i]),
+        ))
+
+    with transaction.atomic():
+        SimilarItem.objects.all().delete()
+        SimilarItem.objects.bulk_create(rows, batch_size=1000)
+        bump_version()
+    return len(rows)
@@ -0,0 +1,127 @@
+"""
+Full-text search over the menu.
+
+Food items are mirrored into a search table (see migration 0002): an FTS5
+virtual table on SQLite and an InnoDB table with FULLTEXT indexes on MySQL.
+The mirror is kept in sync by menu.signals and can be rebuilt with
+``python manage.py rebuild_search_index``. Other databases fall back to the
+old ``icontains`` scan.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import FoodItem
+
+SEARCH_TABLE = 'menu_fooditem_fts'
+
+# Name matches outrank category matches, which outrank description matches
+# (lower scores are better, ties broken by id).
+SQLITE_SEARCH_SQL = (
+    f'SELECT rowid, bm25({SEARCH_TABLE}, 10.0, 1.0, 5.0) AS score FROM {SEARCH_TABLE} '
+    f'WHERE {SEARCH_TABLE} MATCH %s AND available = 1 '
+    'ORDER BY score, rowid'
+)
+MYSQL_SEARCH_SQL = (
+    'SELECT id, -(MATCH(name) AGAINST (%s IN BOOLEAN MODE) * 3 '
+    '+ MATCH(name, description, category) AGAINST (%s IN BOOLEAN MODE)) AS score '
+    f'FROM {SEARCH_TABLE} '
+    'WHERE MATCH(name, description, category) AGAINST (%s IN BOOLEAN MODE) AND available = 1 '
+    'ORDER BY score, id'
+)
+
+
+def is_supported(conn=connection):
+    """Whether the database has a search table"""
+    return conn.vendor in ('sqlite', 'mysql')
+
+
+def _key_column(conn):
+    return 'rowid' if conn.vendor == 'sqlite' else 'id'
+
+
+def rebuild(conn=connection):
+    """Re-index every food item and return how many rows were indexed"""
+    if not is_supported(conn):
+        return 0
+    key = _key_column(conn)
+    with conn.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} ({key}, name, description, category, available) '
+            'SELECT f.id, f.name, f.description, c.name, f.available '
+            'FROM menu_fooditem f INNER JOIN menu_category c ON c.id = f.category_id'
+        )
+        cursor.execute(f'SELECT COUNT(*) FROM {SEARCH_TABLE}')
+        return cursor.fetchone()[0]
+
+
+def index_items(items):
+    """Insert or refresh the search rows of the given food items"""
+    if not items or not is_supported():
+        return
+    key = _key_column(connection)
+    rows = [
+        (item.pk, item.name, item.description, item.category.name, item.available)
+        for item in items
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {SEARCH_TABLE} WHERE {key} = %s', [(row[0],) for row in rows])
+        cursor.executemany(
+            f'INSERT INTO {SEARCH_TABLE} ({key}, name, description, category, available) '
+            'VALUES (%s, %s, %s, %s, %s)',
+            rows,
+        )
+
+
+def remove_items(item_ids):
+    """Drop the search rows of deleted food items"""
+    if not item_ids or not is_supported():
+        return
+    key = _key_column(connection)
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {SEARCH_TABLE} WHERE {key} = %s', [(pk,) for pk in item_ids])
+
+
+def search_terms(query):
+    """Split a user query into lowercase word terms"""
+    return re.findall(r'\w+', query.lower())
+
+
+def search_hits(query, limit=None):
+    """
+    Return ``(id, score)`` pairs of available food items matching every word
+    of ``query`` (as a prefix), most relevant (lowest score) first.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+
+    if connection.vendor == 'sqlite':
+        sql = SQLITE_SEARCH_SQL
+        params = [' '.join(f'"{term}"*' for term in terms)]
+    elif connection.vendor == 'mysql':
+        sql = MYSQL_SEARCH_SQL
+        params = [' '.join(f'+{term}*' for term in terms)] * 3
+    else:
+        filters = Q()
+        for term in terms:
+            filters &= (
+                Q(name__icontains=term) |
+                Q(description__icontains=term) |
+                Q(category__name__icontains=term)
+            )
+        ids = FoodItem.objects.filter(filters, available=True).order_by('id').values_list('id', flat=True)
+        return [(pk, 0.0) for pk in (ids[:limit] if limit else ids)]
+
+    if limit:
+        sql += ' LIMIT %d' % int(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [(row[0], float(row[1])) for row in cursor.fetchall()]
+
+
+def search_item_ids(query, limit=None):
+    """Return the ids of matching food items, most relevant first"""
+    return [pk for pk, score in search_hits(query, limit)]
@@ -0,0 +1,49 @@
+from django.db.models.signals import post_save, post_delete
+from django.db import transaction
+from django.dispatch import receiver
+
+from .models import FoodItem, Category
+from . import catalog, images, search
+from .fragments import card_cache
+
+
+@receiver(post_save, sender=FoodItem)
+@receiver(post_delete, sender=FoodItem)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def catalog_changed(sender, **kwargs):
+    """Bump the catalog version whenever menu data changes"""
+    catalog.bump_version()
+
+
+@receiver(post_save, sender=FoodItem)
+@receiver(post_delete, sender=FoodItem)
+def evict_food_card(sender, instance, **kwargs):
+    """Drop this worker's cached cards of an edited or deleted food item"""
+    card_cache.evict(instance.pk)
+
+
+@receiver(post_save, sender=FoodItem)
+def index_food_item(sender, instance, **kwargs):
+    """Keep the search index in step with a saved food item"""
+    search.index_items([instance])
+
+
+@receiver(post_save, sender=FoodItem)
+def build_image_variants(sender, instance, **kwargs):
+    """Resize a newly uploaded image in the background once it is committed"""
+    if images.needs_variants(instance):
+        transaction.on_commit(lambda: images.submit(instance))
+
+
+@receiver(post_delete, sender=FoodItem)
+def unindex_food_item(sender, instance, **kwargs):
+    """Drop a deleted food item from the search index"""
+    search.remove_items([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+def reindex_category(sender, instance, created, **kwargs):
+    """Category names are searchable, so re-index the category's items"""
+    if not created:
+        search.index_items(list(instance.items.select_related('category')))
@@ -0,0 +1,25 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from menu.fragments import render_card
+from menu.images import best_url, picture_sources
+
+register = template.Library()
+
+
+@register.simple_tag
+def food_card(item, variant='menu'):
+    """Render a cached menu card for ``item``"""
+    return mark_safe(render_card(item, variant))
+
+
+@register.inclusion_tag('partials/food_image.html')
+def food_image(item, size='card', css_class='', sizes=''):
+    """Render ``item``'s image as a <picture> of its resized variants"""
+    return {
+        'item': item,
+        'sources': picture_sources(item, size),
+        'src': best_url(item, size),
+        'css_class': css_class,
+        'sizes': sizes or ('100px' if size == 'thumb' else '(min-width: 992px) 33vw, (min-width: 768px) 50vw, 100vw'),
+    }
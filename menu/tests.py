@@ -0,0 +1,463 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from Base_app.pagination import InvalidCursor, decode_cursor, encode_cursor
+from Base_app.testing import PageTestCase, TestCase
+from menu import autocomplete, catalog, images, recommendations, search
+from menu.fragments import FragmentCache, card_cache, render_card
+from menu.models import Category, FoodItem, SimilarItem
+from menu.views import grid_page
+from orders.models import Order, OrderItem
+
+
+class CatalogSnapshotTests(TestCase):
+    """Workers share a catalog version and read their own uncommitted writes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Starters')
+
+    def setUp(self):
+        cache.clear()
+        catalog.reset()
+        self.addCleanup(catalog.reset)
+
+    def add_item(self, name):
+        return FoodItem.objects.create(
+            name=name, category=self.category, description='Crisp', price='120.00', image='menu_items/item.jpg',
+        )
+
+    def names(self):
+        return {item.name for item in catalog.get_catalog().items}
+
+    def test_snapshot_is_reused_until_the_version_changes(self):
+        first = catalog.get_catalog()
+        with self.assertNumQueries(0):
+            self.assertIs(catalog.get_catalog(), first)
+        cache.set(catalog.VERSION_CACHE_KEY, catalog.new_version(), timeout=None)
+        with self.assertNumQueries(2):
+            self.assertIsNot(catalog.get_catalog(), first)
+
+    def test_commit_publishes_a_new_version(self):
+        version = catalog.current_version()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.add_item('Samosa')
+        # Only the version bump; the image pipeline has no file to resize
+        for callback in callbacks:
+            if isinstance(callback, catalog.VersionBump):
+                callback()
+        self.assertNotEqual(catalog.current_version(), version)
+        self.assertIn('Samosa', self.names())
+
+    def test_writer_reads_its_own_uncommitted_items(self):
+        version = catalog.current_version()
+        self.add_item('Pakora')
+        self.assertIn('Pakora', self.names())
+        with self.assertNumQueries(0):
+            self.assertIn('Pakora', self.names())
+        self.assertEqual(catalog.current_version(), version)
+
+    def test_rolled_back_items_never_reach_the_shared_snapshot(self):
+        try:
+            with transaction.atomic():
+                self.add_item('Cutlet')
+                self.assertIn('Cutlet', self.names())
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertNotIn('Cutlet', self.names())
+
+
+class SearchIndexTests(TestCase):
+    """The full-text index follows menu edits and ranks name matches first"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.curries = Category.objects.create(name='Curries')
+        cls.tikka = cls.add_item('Paneer Tikka', 'Grilled cottage cheese')
+        cls.rice = cls.add_item('Jeera Rice', 'Cumin rice, great with paneer')
+
+    @classmethod
+    def add_item(cls, name, description, **fields):
+        return FoodItem.objects.create(
+            name=name, category=cls.curries, description=description, price='150.00',
+            image='menu_items/item.jpg', **fields,
+        )
+
+    def setUp(self):
+        if not search.is_supported():
+            self.skipTest('No full-text search table on this database')
+
+    def test_name_matches_outrank_description_matches(self):
+        self.assertEqual(search.search_item_ids('paneer'), [self.tikka.pk, self.rice.pk])
+
+    def test_every_word_matches_as_a_prefix(self):
+        self.assertEqual(search.search_item_ids('pan tik'), [self.tikka.pk])
+        self.assertEqual(search.search_item_ids('paneer cumin'), [self.rice.pk])
+
+    def test_saves_and_deletes_reach_the_index(self):
+        self.tikka.name = 'Malai Tikka'
+        self.tikka.save()
+        self.assertEqual(search.search_item_ids('malai'), [self.tikka.pk])
+        self.assertEqual(search.search_item_ids('paneer'), [self.rice.pk])
+
+        self.rice.available = False
+        self.rice.save()
+        self.assertEqual(search.search_item_ids('paneer'), [])
+
+        pk = self.tikka.pk
+        self.tikka.delete()
+        self.assertNotIn(pk, search.search_item_ids('tikka'))
+
+    def test_category_rename_reindexes_its_items(self):
+        self.curries.name = 'Gravies'
+        self.curries.save()
+        self.assertEqual(sorted(search.search_item_ids('gravies')), sorted([self.tikka.pk, self.rice.pk]))
+
+    def test_rebuild_restores_a_lost_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {search.SEARCH_TABLE}')
+        self.assertEqual(search.rebuild(), 2)
+        self.assertEqual(search.search_item_ids('jeera'), [self.rice.pk])
+
+
+class AutocompleteTests(TestCase):
+    """Autocomplete matches word prefixes of available items and follows edits"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.desserts = Category.objects.create(name='Desserts')
+        cls.jamun = cls.add_item('Gulab Jamun', 'Fried milk dumplings')
+        cls.cake = cls.add_item('Milk Cake', 'Dense and sweet')
+        cls.kulfi = cls.add_item('Kulfi', 'Frozen milk', available=False)
+
+    @classmethod
+    def add_item(cls, name, description, **fields):
+        return FoodItem.objects.create(
+            name=name, category=cls.desserts, description=description, price='80.00',
+            image='menu_items/item.jpg', **fields,
+        )
+
+    def suggest(self, query, limit=8):
+        return [json.loads(fragment)['name'] for fragment in autocomplete.suggest(query, limit)]
+
+    def test_matches_prefixes_of_available_items_only(self):
+        self.assertEqual(self.suggest('gul'), ['Gulab Jamun'])
+        self.assertEqual(self.suggest('gulab dump'), ['Gulab Jamun'])
+        self.assertEqual(self.suggest('kul'), [])
+        self.assertEqual(self.suggest('dessert', limit=1), ['Milk Cake'])
+
+    def test_every_word_must_match(self):
+        for query in ('gulab xyz', 'zzz gulab', 'milk zzzzzzzzzzzzzzz'):
+            with self.subTest(query=query):
+                self.assertEqual(self.suggest(query), [])
+        response = self.client.get('/menu/api/search/', {'q': 'gulab xyz'})
+        self.assertEqual(response.json(), {'items': [], 'query': 'gulab xyz'})
+
+    def test_name_matches_rank_first(self):
+        self.assertEqual(self.suggest('milk'), ['Milk Cake', 'Gulab Jamun'])
+
+    def test_edits_are_reindexed(self):
+        self.jamun.name = 'Kala Jamun'
+        self.jamun.save()
+        self.kulfi.available = True
+        self.kulfi.save()
+        self.assertEqual(self.suggest('gul'), [])
+        self.assertEqual(self.suggest('kala'), ['Kala Jamun'])
+        self.assertEqual(self.suggest('kul'), ['Kulfi'])
+
+    def test_api_limits_results(self):
+        response = self.client.get('/menu/api/search/', {'q': 'milk', 'limit': 1})
+        self.assertEqual(response.json(), {
+            'items': [json.loads(autocomplete.suggest('milk', 1)[0])], 'query': 'milk',
+        })
+
+
+class MenuPaginationTests(PageTestCase):
+    """The menu grid pages by cursor without gaps, repeats or drift"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.mains = Category.objects.create(name='Mains')
+        cls.sides = Category.objects.create(name='Sides')
+        cls.items = [cls.add_item(f'Main {i}', cls.mains) for i in range(30)]
+        cls.items += [cls.add_item(f'Side {i}', cls.sides) for i in range(5)]
+        # Ties on created_at are broken by id
+        FoodItem.objects.filter(pk__in=[item.pk for item in cls.items[5:15]]).update(
+            created_at=cls.items[5].created_at
+        )
+
+    @classmethod
+    def add_item(cls, name, category):
+        return FoodItem.objects.create(
+            name=name, category=category, description='Tasty', price='100.00', image='menu_items/item.jpg',
+        )
+
+    def setUp(self):
+        catalog.reset()
+
+    def all_pages(self, **filters):
+        ids, cursor = [], None
+        while True:
+            page = grid_page(catalog.get_catalog(), cursor, **filters)
+            ids += [item.pk for item in page.items]
+            if not page.has_next:
+                return ids
+            cursor = page.next_cursor
+
+    def test_pages_cover_the_grid_once_newest_first(self):
+        expected = list(FoodItem.objects.order_by('-created_at', 'id').values_list('id', flat=True))
+        self.assertEqual(self.all_pages(), expected)
+        self.assertEqual(len(self.all_pages(category_id=self.sides.pk)), 5)
+
+    def test_api_follows_next_urls_to_the_end(self):
+        url, count = '/menu/api/items/', 0
+        while url:
+            data = self.client.get(url).json()
+            count += data['count']
+            url = data['next_url']
+        self.assertEqual(count, len(self.items))
+
+    def test_new_items_do_not_shift_later_pages(self):
+        first = grid_page(catalog.get_catalog())
+        second = [item.pk for item in grid_page(catalog.get_catalog(), first.next_cursor).items]
+        self.add_item('Brand New', self.mains)
+        self.assertEqual([item.pk for item in grid_page(catalog.get_catalog(), first.next_cursor).items], second)
+
+    def test_bad_cursors_are_rejected(self):
+        self.assertEqual(decode_cursor(encode_cursor(('2026-01-01', 7))), ('2026-01-01', 7))
+        with self.assertRaises(InvalidCursor):
+            decode_cursor('not a cursor')
+        self.assertEqual(self.client.get('/menu/api/items/', {'cursor': 'bm9wZQ'}).status_code, 400)
+        self.assertEqual(len(self.client.get('/menu/', {'cursor': 'garbage'}).context['food_items']), 24)
+
+
+class RecommendationTests(PageTestCase):
+    """Item pages show what is bought together, topped up from the category"""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('taster', 'taster@example.com', 'pass')
+        cls.snacks = Category.objects.create(name='Snacks')
+        drinks = Category.objects.create(name='Drinks')
+        cls.vada = cls.add_item('Vada', cls.snacks)
+        cls.chutney = cls.add_item('Chutney', cls.snacks)
+        cls.chai = cls.add_item('Chai', drinks)
+        cls.lassi = cls.add_item('Lassi', drinks)
+        cls.bonda = cls.add_item('Bonda', cls.snacks)
+        baskets = [
+            ('delivered', [cls.vada, cls.chai]),
+            ('delivered', [cls.vada, cls.chai]),
+            ('delivered', [cls.vada, cls.chai, cls.chutney]),
+            ('delivered', [cls.vada, cls.chutney, cls.chutney]),
+            ('cancelled', [cls.vada, cls.lassi]),
+        ]
+        for i, (status, items) in enumerate(baskets):
+            order = Order.objects.create(
+                user=user, order_number=f'ORD-REC{i:04d}', total_price='100.00',
+                delivery_address='5 Road', phone='5555555555', status=status,
+            )
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, food_item=item, quantity=1, price='20.00') for item in items
+            ])
+
+    @classmethod
+    def add_item(cls, name, category):
+        return FoodItem.objects.create(
+            name=name, category=category, description='Fresh', price='20.00', image='menu_items/item.jpg',
+        )
+
+    def setUp(self):
+        catalog.reset()
+
+    def test_neighbours_ranked_by_co_purchase(self):
+        recommendations.build_recommendations()
+        neighbours = list(
+            SimilarItem.objects.filter(food_item=self.vada).values_list('similar__name', 'orders')
+        )
+        # Repeated lines count once per order; cancelled orders not at all
+        self.assertEqual(neighbours, [('Chai', 3), ('Chutney', 2)])
+
+    def test_detail_page_tops_up_from_the_category(self):
+        recommendations.build_recommendations()
+        response = self.client.get(f'/menu/item/{self.vada.pk}/')
+        self.assertEqual(
+            [item.name for item in response.context['similar_items']], ['Chai', 'Chutney', 'Bonda'],
+        )
+
+    def test_unavailable_neighbours_are_skipped(self):
+        recommendations.build_recommendations()
+        self.chai.available = False
+        self.chai.save()
+        response = self.client.get(f'/menu/item/{self.vada.pk}/')
+        self.assertEqual([item.name for item in response.context['similar_items']], ['Chutney', 'Bonda'])
+
+    def test_items_without_history_fall_back_to_the_category(self):
+        response = self.client.get(f'/menu/item/{self.bonda.pk}/')
+        self.assertEqual(
+            [item.name for item in response.context['similar_items']], ['Chutney', 'Vada'],
+        )
+
+
+class CardCacheTests(PageTestCase):
+    """Menu cards render once and are dropped when their item changes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Wraps')
+        cls.wrap = FoodItem.objects.create(
+            name='Kathi Roll', category=category, description='Rolled', price='110.00', image='menu_items/roll.jpg',
+        )
+        cls.other = FoodItem.objects.create(
+            name='Frankie', category=category, description='Rolled', price='100.00', image='menu_items/roll.jpg',
+        )
+
+    def setUp(self):
+        card_cache.clear()
+        self.addCleanup(card_cache.clear)
+
+    def test_lru_keeps_the_most_recently_used(self):
+        fragments = FragmentCache(max_entries=2)
+        fragments.set(('menu', 1), 'one')
+        fragments.set(('menu', 2), 'two')
+        fragments.get(('menu', 1))
+        fragments.set(('menu', 3), 'three')
+        self.assertEqual(fragments.get(('menu', 2)), None)
+        self.assertEqual(fragments.get(('menu', 1)), 'one')
+        self.assertEqual(fragments.stats()['entries'], 2)
+
+    def test_cards_render_once_per_item_and_variant(self):
+        html = render_card(self.wrap, 'menu')
+        self.assertIn('Kathi Roll', html)
+        self.assertEqual(render_card(self.wrap, 'menu'), html)
+        render_card(self.wrap, 'home')
+        stats = card_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 2, 2))
+
+    def test_saving_an_item_evicts_only_its_cards(self):
+        render_card(self.wrap, 'menu')
+        render_card(self.wrap, 'home')
+        render_card(self.other, 'menu')
+        self.wrap.name = 'Egg Roll'
+        self.wrap.save()
+        self.assertEqual(card_cache.stats()['entries'], 1)
+        self.assertIn('Egg Roll', render_card(self.wrap, 'menu'))
+
+    def test_deleting_an_item_evicts_its_cards(self):
+        render_card(self.other, 'menu')
+        self.other.delete()
+        self.assertEqual(card_cache.stats()['entries'], 0)
+
+
+class ConditionalGetTests(PageTestCase):
+    """Catalog pages answer revalidation with 304 until what they show changes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('browser', 'browser@example.com', 'pass')
+        category = Category.objects.create(name='Soups')
+        cls.soup = FoodItem.objects.create(
+            name='Rasam', category=category, description='Tangy', price='60.00', image='menu_items/rasam.jpg',
+        )
+
+    def setUp(self):
+        cache.clear()
+        catalog.reset()
+
+    def revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_unchanged_pages_answer_304(self):
+        for url in ('/menu/', f'/menu/item/{self.soup.pk}/', '/menu/api/search/?q=ras'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('no-cache', response['Cache-Control'])
+                self.assertEqual(self.revalidate(url, response).status_code, 304)
+                modified_since = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+                self.assertEqual(modified_since.status_code, 304)
+
+    def test_menu_edits_change_the_etag(self):
+        response = self.client.get('/menu/')
+        self.soup.price = '65.00'
+        self.soup.save()
+        self.assertEqual(self.revalidate('/menu/', response).status_code, 200)
+
+    def test_rebuilt_recommendations_change_the_item_etag(self):
+        url = f'/menu/item/{self.soup.pk}/'
+        response = self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            recommendations.build_recommendations()
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+        # The menu grid does not show recommendations
+        menu = self.client.get('/menu/')
+        self.assertEqual(self.revalidate('/menu/', menu).status_code, 304)
+
+    def test_personal_pages_are_not_validated(self):
+        self.client.force_login(self.user)
+        response = self.client.get('/menu/')
+        self.assertFalse(response.has_header('ETag'))
+
+
+class ImageVariantTests(TestCase):
+    """Uploaded images are rendered to every size and stored only for the current image"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Rice')
+        cls.item = FoodItem.objects.create(
+            name='Pulao', category=category, description='Fragrant', price='140.00', image='menu_items/pulao.jpg',
+        )
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        os.makedirs(os.path.join(self.media_root, 'menu_items'))
+        self.source = os.path.join(self.media_root, 'menu_items', 'pulao.jpg')
+        images.Image.new('RGB', (600, 400), 'orange').save(self.source)
+
+    def test_render_variants_never_upscales(self):
+        variants = images.render_variants(self.source, self.media_root)
+        self.assertEqual((variants['width'], variants['height']), (600, 400))
+        self.assertEqual([width for width, name in variants['sizes']['thumb']['jpg']], [160, 320])
+        # The 960w card would upscale, so the original width stands in for it
+        self.assertEqual([width for width, name in variants['sizes']['card']['jpg']], [480, 600])
+        for ext, mime, pil_format, options in images.available_formats():
+            for width, name in variants['sizes']['card'][ext]:
+                self.assertTrue(name.startswith(images.VARIANTS_DIR + '/'))
+                with images.Image.open(os.path.join(self.media_root, name)) as variant:
+                    self.assertEqual(variant.width, width)
+
+    def test_variant_names_follow_the_content(self):
+        first = images.render_variants(self.source, self.media_root)
+        self.assertEqual(images.render_variants(self.source, self.media_root), first)
+        images.Image.new('RGB', (600, 400), 'green').save(self.source)
+        second = images.render_variants(self.source, self.media_root)
+        self.assertNotEqual(first['sizes']['thumb']['jpg'], second['sizes']['thumb']['jpg'])
+
+    def test_stored_variants_are_served(self):
+        self.assertTrue(images.needs_variants(self.item))
+        self.assertEqual(images.best_url(self.item, 'thumb'), self.item.image.url)
+        variants = images.render_variants(self.source, self.media_root)
+        self.assertEqual(images.store_variants(self.item.pk, self.item.image.name, variants), 1)
+
+        self.item.refresh_from_db()
+        self.assertFalse(images.needs_variants(self.item))
+        self.assertEqual(images.best_url(self.item, 'thumb'), f'/media/{variants["sizes"]["thumb"]["jpg"][0][1]}')
+        types = [mime for mime, srcset in images.picture_sources(self.item, 'card')]
+        self.assertEqual(types[-1], 'image/jpeg')
+        self.assertIn('image/webp', types)
+
+    def test_variants_of_a_replaced_image_are_dropped(self):
+        variants = images.render_variants(self.source, self.media_root)
+        FoodItem.objects.filter(pk=self.item.pk).update(image='menu_items/biryani.jpg')
+        self.assertEqual(images.store_variants(self.item.pk, 'menu_items/pulao.jpg', variants), 0)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.image_variants, {})
+        self.assertEqual(images.picture_sources(self.item, 'card'), [])
@@ -7,4 +7,5 @@ urlpatterns = [
     path('item/<int:item_id>/', views.menu_item_detail, name='menu_item_detail'),
     path('search/', views.search_page, name='search_page'),
     path('api/search/', views.search_api, name='search_api'),
+    path('api/items/', views.menu_page_api, name='menu_page_api'),
 ]
@@ -1,52 +1,135 @@
-from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
+import json
+from urllib.parse import urlencode
+
+from django.shortcuts import render
+from django.http import HttpResponse, JsonResponse, Http404
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.views.decorators.csrf import ensure_csrf_cookie
 from django.views.decorators.http import require_http_methods
-from django.db.models import Q
-from .models import FoodItem, Category
+from Base_app.pagination import paginate, InvalidCursor
+from . import autocomplete
+from .catalog import get_catalog
+from .conditional import catalog_page_condition, catalog_api_condition, item_page_condition
+from .models import SimilarItem
+from .search import search_hits
+
+SEARCH_API_DEFAULT_LIMIT = 8
+SEARCH_API_MAX_LIMIT = 20
+SIMILAR_ITEMS_COUNT = 4
+
+
+def grid_key(item):
+    """Sort key of the menu grid, matching FoodItem.Meta.ordering"""
+    return (-item.created_at.timestamp(), item.pk)
+
+
+def search_key(hit):
+    """Sort key of search results: relevance score, then id"""
+    return (hit[0], hit[1].pk)
+
+
+def parse_category_id(value):
+    """Parse the ``category`` query parameter, returning -1 if it is invalid"""
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return -1
+
+
+def grid_page(catalog, cursor=None, category_id=None, query=''):
+    """Return one keyset page of the menu grid or of search results"""
+    if query:
+        items_by_id = catalog.items_by_id
+        hits = [(score, items_by_id[pk]) for pk, score in search_hits(query) if pk in items_by_id]
+        page = paginate(hits, search_key, cursor)
+        page.items = [item for score, item in page.items]
+        return page
+    if category_id is None:
+        items = catalog.available
+    else:
+        items = catalog.items_by_category.get(category_id, ())
+    return paginate(items, grid_key, cursor)
+
+
+def grid_context(request, category_id=None, query=''):
+    """Template context shared by every page that renders the menu grid"""
+    catalog = get_catalog()
+    try:
+        page = grid_page(catalog, request.GET.get('cursor'), category_id, query)
+    except InvalidCursor:
+        page = grid_page(catalog, None, category_id, query)
+    next_page_url = None
+    if page.has_next:
+        params = {'cursor': page.next_cursor}
+        if category_id is not None:
+            params['category'] = category_id
+        if query:
+            params['q'] = query
+        next_page_url = f"{reverse('menu_page_api')}?{urlencode(params)}"
+    return {
+        'food_items': page.items,
+        'categories': catalog.categories,
+        'next_page_url': next_page_url,
+    }
+
+
+def get_similar_items(catalog, food_item, count=SIMILAR_ITEMS_COUNT):
+    """Items frequently bought with ``food_item``, topped up from its category"""
+    similar_ids = SimilarItem.objects.filter(food_item=food_item).values_list('similar_id', flat=True)
+    items = []
+    for pk in similar_ids:
+        item = catalog.items_by_id.get(pk)
+        if item is not None and item.available:
+            items.append(item)
+    if len(items) < count:
+        seen = {food_item.pk}.union(item.pk for item in items)
+        items.extend(
+            item for item in catalog.items_by_category.get(food_item.category_id, ())
+            if item.pk not in seen
+        )
+    return items[:count]
+
 
 @require_http_methods(["GET"])
+@ensure_csrf_cookie
+@catalog_page_condition
 def menu_list(request):
     """Display all food items"""
-    food_items = FoodItem.objects.filter(available=True)
-    categories = Category.objects.all()
-    
     # Filter by category if provided
     category_id = request.GET.get('category')
-    if category_id:
-        food_items = food_items.filter(category_id=category_id)
-    
-    context = {
-        'food_items': food_items,
-        'categories': categories,
-        'selected_category': category_id,
-    }
+    context = grid_context(request, category_id=parse_category_id(category_id))
+    context['selected_category'] = category_id
     return render(request, 'menu.html', context)
 
 
 @require_http_methods(["GET"])
+@ensure_csrf_cookie
+@catalog_page_condition
 def menu_by_category(request, category_id):
     """Display food items by category"""
-    category = get_object_or_404(Category, pk=category_id)
-    food_items = FoodItem.objects.filter(category=category, available=True)
-    categories = Category.objects.all()
+    category = get_catalog().categories_by_id.get(category_id)
+    if category is None:
+        raise Http404('No Category matches the given query.')
     
-    context = {
-        'food_items': food_items,
-        'categories': categories,
-        'selected_category': category_id,
-        'category_name': category.name,
-    }
+    context = grid_context(request, category_id=category_id)
+    context['selected_category'] = category_id
+    context['category_name'] = category.name
     return render(request, 'menu.html', context)
 
 
 @require_http_methods(["GET"])
+@ensure_csrf_cookie
+@item_page_condition
 def menu_item_detail(request, item_id):
     """Display food item details"""
-    food_item = get_object_or_404(FoodItem, pk=item_id)
-    similar_items = FoodItem.objects.filter(
-        category=food_item.category,
-        available=True
-    ).exclude(pk=item_id)[:4]
+    catalog = get_catalog()
+    food_item = catalog.items_by_id.get(item_id)
+    if food_item is None:
+        raise Http404('No FoodItem matches the given query.')
+    similar_items = get_similar_items(catalog, food_item)
     
     context = {
         'food_item': food_item,
@@ -56,64 +139,67 @@ def menu_item_detail(request, item_id):
 
 
 @require_http_methods(["GET"])
+@ensure_csrf_cookie
 def search_menu(request):
     """Search food items"""
     query = request.GET.get('q', '')
-    food_items = FoodItem.objects.filter(available=True)
-    categories = Category.objects.all()
-    
-    if query:
-        food_items = food_items.filter(
-            Q(name__icontains=query) |
-            Q(description__icontains=query) |
-            Q(category__name__icontains=query)
-        )
-    
-    context = {
-        'food_items': food_items,
-        'categories': categories,
-        'search_query': query,
-    }
+    context = grid_context(request, query=query)
+    context['search_query'] = query
     return render(request, 'menu.html', context)
 
 
 @require_http_methods(["GET"])
+@catalog_api_condition
 def search_api(request):
     """API endpoint for autocomplete search - returns JSON"""
     query = request.GET.get('q', '').strip()
-    limit = int(request.GET.get('limit', 8))
+    try:
+        limit = int(request.GET.get('limit', SEARCH_API_DEFAULT_LIMIT))
+    except ValueError:
+        limit = SEARCH_API_DEFAULT_LIMIT
+    limit = max(1, min(limit, SEARCH_API_MAX_LIMIT))
     
     if len(query) < 1:
         return JsonResponse({'items': []})
     
-    items = FoodItem.objects.filter(available=True).filter(
-        Q(name__icontains=query) |
-        Q(description__icontains=query) |
-        Q(category__name__icontains=query)
-    ).values('id', 'name', 'price', 'image')[:limit]
-    
-    return JsonResponse({'items': list(items), 'query': query})
+    # Fragments are pre-serialised by the autocomplete index
+    fragments = autocomplete.suggest(query, limit)
+    body = '{"items": [%s], "query": %s}' % (', '.join(fragments), json.dumps(query))
+    return HttpResponse(body, content_type='application/json')
 
 
 @require_http_methods(["GET"])
+@ensure_csrf_cookie
 def search_page(request):
     """Dedicated search page with live autocomplete"""
     # If a query is provided, perform a search and render the menu with results
     query = request.GET.get('q', '').strip()
     # If query provided, render menu results. If not, render menu list (search.html may be removed).
-    if query:
-        food_items = FoodItem.objects.filter(available=True).filter(
-            Q(name__icontains=query) |
-            Q(description__icontains=query) |
-            Q(category__name__icontains=query)
-        )
-    else:
-        food_items = FoodItem.objects.filter(available=True)
-
-    categories = Category.objects.all()
-    context = {
-        'food_items': food_items,
-        'categories': categories,
-        'search_query': query,
-    }
+    context = grid_context(request, query=query)
+    context['search_query'] = query
     return render(request, 'menu.html', context)
+
+
+@require_http_methods(["GET"])
+def menu_page_api(request):
+    """API endpoint for infinite scroll - returns the next page of grid cards"""
+    query = request.GET.get('q', '').strip()
+    category_id = parse_category_id(request.GET.get('category'))
+    try:
+        page = grid_page(get_catalog(), request.GET.get('cursor'), category_id, query)
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+    
+    next_page_url = None
+    if page.has_next:
+        params = request.GET.copy()
+        params['cursor'] = page.next_cursor
+        next_page_url = f"{reverse('menu_page_api')}?{params.urlencode()}"
+    
+    html = render_to_string('partials/menu_cards.html', {'food_items': page.items}, request=request)
+    return JsonResponse({
+        'html': html,
+        'count': len(page.items),
+        'next_cursor': page.next_cursor,
+        'next_url': next_page_url,
+    })
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Order, OrderItem
+from .models import ArchivedOrder, Order, OrderItem, OrderStatusEvent
 
 
 class OrderItemInline(admin.TabularInline):
@@ -8,16 +8,37 @@ class OrderItemInline(admin.TabularInline):
     readonly_fields = ['food_item', 'quantity', 'price']
 
 
+class OrderStatusEventInline(admin.TabularInline):
+    model = OrderStatusEvent
+    extra = 0
+    readonly_fields = ['from_status', 'to_status', 'version', 'actor', 'created_at']
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ['order_number', 'user', 'total_price', 'status', 'payment_status', 'created_at']
     list_filter = ['status', 'payment_status', 'created_at', 'payment_method']
     search_fields = ['order_number', 'user__username', 'phone']
-    readonly_fields = ['order_number', 'user', 'created_at', 'updated_at']
+    readonly_fields = ['order_number', 'user', 'version', 'created_at', 'updated_at']
     fieldsets = (
         ('Order Info', {'fields': ('order_number', 'user', 'total_price')}),
         ('Status', {'fields': ('status', 'payment_status', 'payment_method')}),
         ('Delivery', {'fields': ('delivery_address', 'phone', 'special_instructions', 'estimated_delivery')}),
-        ('Timestamps', {'fields': ('created_at', 'updated_at')}),
+        ('Timestamps', {'fields': ('version', 'created_at', 'updated_at')}),
     )
-    inlines = [OrderItemInline]
+    inlines = [OrderItemInline, OrderStatusEventInline]
+
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(admin.ModelAdmin):
+    list_display = ['order_number', 'user_id', 'total_price', 'status', 'payment_status', 'created_at', 'archived_at']
+    list_filter = ['status', 'payment_status']
+    search_fields = ['order_number']
+    readonly_fields = ['id', 'order_number', 'user_id', 'total_price', 'status', 'payment_status', 'created_at', 'data', 'archived_at']
+
+    def has_add_permission(self, request):
+        return False
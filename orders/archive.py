@@ -0,0 +1,173 @@
+"""
+Hot/cold archival of finished orders.
+
+Delivered and cancelled orders placed more than ``ORDER_ARCHIVE_DAYS`` ago
+are moved out of the hot tables (Order, OrderItem, OrderStatusEvent and
+Payment) into ArchivedOrder: one row per order, with the columns the order
+pages look up and list on, and the order, its items, payment and status
+events as JSON. The staff pages, the kitchen queue and order history then
+only touch the orders still in play plus a few months of history, small
+enough to stay in the page cache.
+
+Orders move ``ORDER_ARCHIVE_BATCH`` at a time, one short transaction per
+batch: read the orders with their items, payment and events, write the
+archive rows, roll their counts and revenue into ArchiveStats and
+ArchivedItemTotal for the dashboard, then delete the originals. No lock is
+held for longer than one batch takes. Run ``python manage.py archive_orders``
+from cron.
+
+The archive can live in its own database, such as a separate SQLite file: add
+it to DATABASES, set ``ORDER_ARCHIVE_DATABASE`` to its alias and run
+``migrate --database <alias>``; orders.routers.ArchiveRouter sends the
+archive models there. Each batch then commits its archive rows before
+deleting the originals, and orders already in the archive are skipped, so a
+batch interrupted in between is finished by the next run without being
+counted twice.
+"""
+import time
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from payments.models import Payment
+from .models import ArchivedItemTotal, ArchivedOrder, ArchiveStats, Order, OrderItem, OrderStatusEvent
+
+FINISHED_STATUSES = ('delivered', 'cancelled')
+
+
+def cutoff(days=None):
+    """Orders placed before this are old enough to archive"""
+    days = settings.ORDER_ARCHIVE_DAYS if days is None else days
+    return timezone.now() - timedelta(days=days)
+
+
+def archivable(before):
+    return Order.objects.filter(status__in=FINISHED_STATUSES, created_at__lt=before)
+
+
+def group_by_order(rows):
+    grouped = defaultdict(list)
+    for row in rows:
+        grouped[row['order_id']].append(row)
+    return grouped
+
+
+def archive_batch(before, batch_size):
+    """Archive up to ``batch_size`` finished orders placed before ``before``; returns how many"""
+    with transaction.atomic():
+        orders = list(archivable(before).order_by('created_at', 'pk').values()[:batch_size])
+        if not orders:
+            return 0
+        ids = [order['id'] for order in orders]
+        items = group_by_order(
+            OrderItem.objects.filter(order_id__in=ids)
+            .values('order_id', 'food_item_id', 'quantity', 'price', name=F('food_item__name'))
+        )
+        payments = {row['order_id']: row for row in Payment.objects.filter(order_id__in=ids).values()}
+        events = group_by_order(OrderStatusEvent.objects.filter(order_id__in=ids).order_by('version').values())
+
+        # Inside the hot transaction: with one database it all commits
+        # together, with two the archive commits before anything is deleted
+        with transaction.atomic(using=settings.ORDER_ARCHIVE_DATABASE):
+            done = set(ArchivedOrder.objects.filter(pk__in=ids).values_list('pk', flat=True))
+            fresh = [order for order in orders if order['id'] not in done]
+            ArchivedOrder.objects.bulk_create([
+                ArchivedOrder(
+                    id=order['id'],
+                    order_number=order['order_number'],
+                    user_id=order['user_id'],
+                    total_price=order['total_price'],
+                    status=order['status'],
+                    payment_status=order['payment_status'],
+                    created_at=order['created_at'],
+                    data={
+                        'order': order,
+                        'items': [
+                            {key: item[key] for key in ('food_item_id', 'name', 'quantity', 'price')}
+                            for item in items[order['id']]
+                        ],
+                        'payment': payments.get(order['id']),
+                        'events': events[order['id']],
+                    },
+                )
+                for order in fresh
+            ])
+            add_stats(fresh, payments)
+            add_item_totals([item for order in fresh for item in items[order['id']]])
+
+        # Items, status events and the payment go with their order
+        Order.objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def add_stats(orders, payments):
+    """Roll archived orders into the per-status counts and revenue"""
+    totals = {}
+    for order in orders:
+        count, revenue = totals.get(order['status'], (0, Decimal(0)))
+        payment = payments.get(order['id'])
+        if payment and payment['status'] == 'completed':
+            revenue += payment['amount']
+        totals[order['status']] = (count + 1, revenue)
+    for status, (count, revenue) in totals.items():
+        ArchiveStats.objects.get_or_create(status=status)
+        ArchiveStats.objects.filter(status=status).update(
+            orders=F('orders') + count, revenue=F('revenue') + revenue
+        )
+
+
+def add_item_totals(items):
+    """Roll archived order items into the per-dish portion counts"""
+    quantities, names = defaultdict(int), {}
+    for item in items:
+        quantities[item['food_item_id']] += item['quantity']
+        names[item['food_item_id']] = item['name']
+    if not quantities:
+        return
+    existing = {
+        row.food_item_id: row
+        for row in ArchivedItemTotal.objects.select_for_update().filter(food_item_id__in=quantities)
+    }
+    for food_item_id, row in existing.items():
+        row.quantity += quantities[food_item_id]
+        row.name = names[food_item_id]
+    ArchivedItemTotal.objects.bulk_update(existing.values(), ['quantity', 'name'])
+    ArchivedItemTotal.objects.bulk_create([
+        ArchivedItemTotal(food_item_id=food_item_id, name=names[food_item_id], quantity=quantity)
+        for food_item_id, quantity in quantities.items()
+        if food_item_id not in existing
+    ])
+
+
+def archive_orders(days=None, batch_size=None, pause=0.0):
+    """
+    Archive every finished order older than ``days`` in batches, sleeping
+    ``pause`` seconds between them to let other writers in; returns how many
+    """
+    before = cutoff(days)
+    batch_size = batch_size or settings.ORDER_ARCHIVE_BATCH
+    total = 0
+    while archived := archive_batch(before, batch_size):
+        total += archived
+        if pause:
+            time.sleep(pause)
+    return total
+
+
+def stats():
+    """Archived order counts by status, and the revenue they brought in"""
+    rows = list(ArchiveStats.objects.all())
+    return {row.status: row.orders for row in rows}, sum((row.revenue for row in rows), Decimal(0))
+
+
+def item_totals():
+    """Portions sold in archived orders, by dish name"""
+    totals = defaultdict(int)
+    for name, quantity in ArchivedItemTotal.objects.values_list('name', 'quantity'):
+        totals[name] += quantity
+    return totals
@@ -0,0 +1,217 @@
+"""
+Learned delivery-time model.
+
+A linear model of the minutes from ``Order.created_at`` to the order's
+``delivered`` OrderStatusEvent, fitted offline with NumPy by ridge regression
+over these features:
+
+    intercept
+    hour of day (one-hot, 24)
+    weekday (one-hot, 7)
+    log(1 + portions), distinct dishes
+    portions per menu category (one per category seen in training)
+
+The design matrix is assembled with vectorised index arithmetic, like
+menu.recommendations, and the coefficients are stored as one float32 array
+(plus the category ids they belong to) in ``settings.ETA_MODEL_PATH``.
+
+At checkout nearly every feature is zero, so a prediction is a sparse dot
+product: the intercept, one hour weight, one weekday weight, two basket
+weights and one category weight per line, summed over plain Python floats.
+That costs well under a microsecond per line and no queries; see the
+benchmark_eta command. Run ``python manage.py train_eta_model`` from cron to
+refit; workers look for a new file at most every ``MODEL_CHECK_SECONDS`` and
+pick it up on their next checkout after that.
+"""
+import math
+import os
+import threading
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+HOURS = 24
+WEEKDAYS = 7
+HOUR_OFFSET = 1
+WEEKDAY_OFFSET = HOUR_OFFSET + HOURS
+PORTIONS = WEEKDAY_OFFSET + WEEKDAYS
+DISHES = PORTIONS + 1
+CATEGORY_OFFSET = DISHES + 1
+
+RIDGE = 1.0
+MIN_MINUTES = 10
+# Deliveries outside this range are data-entry mistakes, not signal
+MIN_TRAINING_MINUTES = 5
+MAX_TRAINING_MINUTES = 240
+
+# How often a worker stats ETA_MODEL_PATH for a retrained model
+MODEL_CHECK_SECONDS = 5
+
+_model = None
+_model_stamp = None  # (path, mtime) of the loaded file
+_checked = None  # (path, time.monotonic()) of the last stat
+_lock = threading.Lock()
+
+
+class DeliveryModel:
+    """Fitted coefficients, unpacked for scalar evaluation"""
+
+    def __init__(self, coef, category_ids):
+        coef = [float(value) for value in coef]
+        self.coef = coef
+        self.category_ids = [int(pk) for pk in category_ids]
+        self.intercept = coef[0]
+        self.hour = tuple(coef[HOUR_OFFSET:WEEKDAY_OFFSET])
+        self.weekday = tuple(coef[WEEKDAY_OFFSET:PORTIONS])
+        self.portions = coef[PORTIONS]
+        self.dishes = coef[DISHES]
+        self.category = dict(zip(self.category_ids, coef[CATEGORY_OFFSET:]))
+
+    def predict_minutes(self, hour, weekday, lines):
+        """Minutes to deliver ``(category_id, quantity)`` lines ordered at ``hour`` on ``weekday``"""
+        category = self.category
+        total = self.intercept + self.hour[hour] + self.weekday[weekday]
+        portions = 0
+        for category_id, quantity in lines:
+            portions += quantity
+            total += category.get(category_id, 0.0) * quantity
+        total += self.portions * math.log1p(portions) + self.dishes * len(lines)
+        return max(total, MIN_MINUTES)
+
+    def save(self, path):
+        # Write aside and swap in, so a worker never loads half a file
+        partial = f'{path}.partial'
+        with open(partial, 'wb') as f:
+            np.savez(
+                f,
+                coef=np.asarray(self.coef, dtype=np.float32),
+                categories=np.asarray(self.category_ids, dtype=np.int64),
+            )
+        os.replace(partial, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['coef'], data['categories'])
+
+
+def design_matrix(order_ids, created_at, item_order_ids, item_category_ids, item_quantities, category_ids):
+    """
+    Build the feature matrix of orders from their item rows. ``created_at``
+    are aware datetimes; item rows may come in any order.
+    """
+    order_ids = np.asarray(order_ids, dtype=np.int64)
+    n = len(order_ids)
+    X = np.zeros((n, CATEGORY_OFFSET + len(category_ids)))
+    X[:, 0] = 1.0
+
+    local = [timezone.localtime(when) for when in created_at]
+    rows = np.arange(n)
+    X[rows, HOUR_OFFSET + np.array([when.hour for when in local], dtype=np.int64)] = 1.0
+    X[rows, WEEKDAY_OFFSET + np.array([when.weekday() for when in local], dtype=np.int64)] = 1.0
+
+    # Map each item row onto its order's row and its category's column
+    sorter = np.argsort(order_ids)
+    item_rows = sorter[np.searchsorted(order_ids, np.asarray(item_order_ids, dtype=np.int64), sorter=sorter)]
+    quantities = np.asarray(item_quantities, dtype=np.float64)
+    portions = np.bincount(item_rows, weights=quantities, minlength=n)
+    X[:, PORTIONS] = np.log1p(portions)
+    X[:, DISHES] = np.bincount(item_rows, minlength=n)
+
+    category_ids = np.asarray(category_ids, dtype=np.int64)
+    if len(category_ids):
+        item_categories = np.asarray(item_category_ids, dtype=np.int64)
+        columns = np.minimum(np.searchsorted(category_ids, item_categories), len(category_ids) - 1)
+        known = category_ids[columns] == item_categories
+        np.add.at(X, (item_rows[known], CATEGORY_OFFSET + columns[known]), quantities[known])
+    return X
+
+
+def fit(X, y, ridge=RIDGE):
+    """Ridge regression coefficients; the intercept is not penalised"""
+    penalty = np.full(X.shape[1], float(ridge))
+    penalty[0] = 0.0
+    return np.linalg.solve(X.T @ X + np.diag(penalty), X.T @ y)
+
+
+def training_data():
+    """Return ``(X, y, created_at, category_ids)`` for every delivered order"""
+    from .models import OrderItem, OrderStatusEvent
+
+    delivered = list(
+        OrderStatusEvent.objects.filter(to_status='delivered')
+        .values_list('order_id', 'order__created_at', 'created_at')
+        .order_by('order__created_at')
+    )
+    seen, orders = set(), []
+    for order_id, created_at, delivered_at in delivered:
+        minutes = (delivered_at - created_at).total_seconds() / 60
+        if order_id not in seen and MIN_TRAINING_MINUTES <= minutes <= MAX_TRAINING_MINUTES:
+            seen.add(order_id)
+            orders.append((order_id, created_at, minutes))
+    if not orders:
+        return np.empty((0, CATEGORY_OFFSET)), np.empty(0), [], np.empty(0, np.int64)
+
+    items = np.array(
+        OrderItem.objects.filter(order__status='delivered')
+        .values_list('order_id', 'food_item__category_id', 'quantity')
+        .order_by(),
+        dtype=np.int64,
+    ).reshape(-1, 3)
+    items = items[np.isin(items[:, 0], list(seen))]
+    category_ids = np.unique(items[:, 1])
+
+    order_ids, created_at, minutes = zip(*orders)
+    X = design_matrix(order_ids, created_at, items[:, 0], items[:, 1], items[:, 2], category_ids)
+    return X, np.asarray(minutes), list(created_at), category_ids
+
+
+def train(ridge=RIDGE, holdout=0.2):
+    """
+    Fit on delivered orders and return ``(model, rows, holdout_mae)``. The
+    newest ``holdout`` share of orders is scored first, then everything is
+    used for the stored fit.
+    """
+    X, y, created_at, category_ids = training_data()
+    if len(y) <= X.shape[1]:
+        return None, len(y), None
+
+    split = int(len(y) * (1 - holdout))
+    mae = None
+    if 0 < split < len(y):
+        coef = fit(X[:split], y[:split], ridge)
+        mae = float(np.mean(np.abs(X[split:] @ coef - y[split:])))
+    return DeliveryModel(fit(X, y, ridge), category_ids), len(y), mae
+
+
+def get_model():
+    """The stored model, reloaded when its file changes; None until trained"""
+    global _model, _model_stamp, _checked
+    path = settings.ETA_MODEL_PATH
+    now = time.monotonic()
+    checked = _checked
+    if checked is not None and checked[0] == path and now - checked[1] < MODEL_CHECK_SECONDS:
+        return _model
+    try:
+        stamp = (path, os.stat(path).st_mtime_ns)
+    except OSError:
+        stamp = None
+    with _lock:
+        if stamp != _model_stamp:
+            _model = DeliveryModel.load(path) if stamp else None
+            _model_stamp = stamp
+        _checked = (path, now)
+    return _model
+
+
+def predict_delivery(lines, when):
+    """When history says ``lines`` ordered at ``when`` arrive, or None"""
+    model = get_model()
+    if model is None:
+        return None
+    local = timezone.localtime(when)
+    pairs = [(line.food_item.category_id, line.quantity) for line in lines]
+    return when + timedelta(minutes=model.predict_minutes(local.hour, local.weekday(), pairs))
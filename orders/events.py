@@ -0,0 +1,234 @@
+"""
+Order status push.
+
+When an order's ``status`` or ``payment_status`` changes, orders.status
+publishes a small event, once the transaction commits, to two channels: the
+customer's (``user:<id>``) and the staff feed (``staff``). The Server-Sent
+Events views in orders.views and dashboard.views hold one subscription per
+open page and stream what arrives, so pages update without reloading.
+
+Two brokers implement the same ``subscribe``/``unsubscribe``/``publish``
+interface; ``settings.ORDER_EVENTS_BROKER`` picks one:
+
+``LocalBroker``
+    In-process fan-out. Enough when one process serves the site.
+``SocketBroker``
+    A stand-in for a Redis-style pub/sub across the worker processes of one
+    host. Each worker with listeners binds a Unix datagram socket in
+    ``ORDER_EVENTS_SOCKET_DIR``; publishing sends the event to every socket
+    there. Sockets of dead workers are removed on the next publish.
+
+Subscribers live on the ASGI event loop and publishers are ordinary sync view
+code, so delivery hops onto the loop with ``call_soon_threadsafe``. A
+subscriber that stops reading loses its oldest events rather than growing
+without bound.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+STAFF_CHANNEL = 'staff'
+QUEUE_SIZE = 100
+MAX_DATAGRAM = 8192
+HEARTBEAT_SECONDS = 15
+# Streams end after this long and EventSource reconnects, so proxies and
+# load balancers never see a connection older than a few minutes
+STREAM_SECONDS = 300
+RETRY_MS = 3000
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+class Subscription:
+    """One listener's queue of events, read on its event loop"""
+
+    def __init__(self, channel, loop):
+        self.channel = channel
+        self.loop = loop
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+
+    def put(self, message):
+        """Queue a message from any thread"""
+        self.loop.call_soon_threadsafe(self._put, message)
+
+    def _put(self, message):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class LocalBroker:
+    """Fans events out to the subscribers of this process"""
+
+    def __init__(self):
+        self.subscribers = defaultdict(set)
+        self.lock = threading.Lock()
+
+    def subscribe(self, channel):
+        """Subscribe to ``channel``; call from the event loop"""
+        subscription = Subscription(channel, asyncio.get_running_loop())
+        with self.lock:
+            self.subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            listeners = self.subscribers.get(subscription.channel)
+            if listeners is not None:
+                listeners.discard(subscription)
+                if not listeners:
+                    del self.subscribers[subscription.channel]
+
+    def deliver(self, channel, message):
+        with self.lock:
+            listeners = list(self.subscribers.get(channel, ()))
+        for subscription in listeners:
+            subscription.put(message)
+
+    def publish(self, channel, message):
+        self.deliver(channel, message)
+
+
+class SocketBroker(LocalBroker):
+    """LocalBroker whose publishes reach every worker on the host"""
+
+    def __init__(self, socket_dir=None):
+        super().__init__()
+        self.socket_dir = socket_dir or settings.ORDER_EVENTS_SOCKET_DIR
+        os.makedirs(self.socket_dir, exist_ok=True)
+        self.path = None
+        self.sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sender.setblocking(False)
+
+    def subscribe(self, channel):
+        subscription = super().subscribe(channel)
+        with self.lock:
+            if self.path is None:
+                self._listen()
+        return subscription
+
+    def _listen(self):
+        # Bound lazily: workers that never hold a listener get no socket
+        self.path = os.path.join(self.socket_dir, f'{os.getpid()}-{uuid.uuid4().hex[:8]}.sock')
+        receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        receiver.bind(self.path)
+        threading.Thread(target=self._receive, args=(receiver,), daemon=True).start()
+
+    def _receive(self, receiver):
+        while True:
+            data = receiver.recv(MAX_DATAGRAM)
+            try:
+                channel, message = json.loads(data)
+            except ValueError:
+                continue
+            self.deliver(channel, message)
+
+    def publish(self, channel, message):
+        data = json.dumps([channel, message]).encode()
+        for name in os.listdir(self.socket_dir):
+            if not name.endswith('.sock'):
+                continue
+            path = os.path.join(self.socket_dir, name)
+            try:
+                self.sender.sendto(data, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Its worker has exited
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+            except OSError:
+                # A full receive buffer; that worker's listeners miss this one
+                pass
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """The process-wide broker built from ``settings.ORDER_EVENTS_BROKER``"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.ORDER_EVENTS_BROKER)()
+    return _broker
+
+
+def order_event(order):
+    return {
+        'order_number': order.order_number,
+        'status': order.status,
+        'status_display': order.get_status_display(),
+        'payment_status': order.payment_status,
+        'version': order.version,
+    }
+
+
+def publish_order(order):
+    """Push the order's status to its customer and to staff after commit"""
+    message = order_event(order)
+    user_id = order.user_id
+
+    def send():
+        # The change is committed; a push failure only costs live updates
+        try:
+            broker = get_broker()
+            broker.publish(user_channel(user_id), message)
+            broker.publish(STAFF_CHANNEL, message)
+        except OSError:
+            logger.exception('Could not publish status of order %s', message['order_number'])
+
+    transaction.on_commit(send)
+
+
+async def stream(channel):
+    """Yield Server-Sent Events for ``channel`` until STREAM_SECONDS pass"""
+    broker = get_broker()
+    subscription = broker.subscribe(channel)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + STREAM_SECONDS
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                message = await asyncio.wait_for(subscription.get(), min(HEARTBEAT_SECONDS, remaining))
+            except TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            yield f'event: order\ndata: {json.dumps(message)}\n\n'
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def event_stream_response(request, channel):
+    """
+    Stream ``channel`` to the browser. Only an ASGI server can hold the
+    connection open without tying up a worker; under WSGI answer 204, which
+    tells EventSource not to reconnect, and pages keep working by reload.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    response = StreamingHttpResponse(stream(channel), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Stop nginx buffering the stream
+    return response
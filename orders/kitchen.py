@@ -0,0 +1,174 @@
+"""
+Kitchen queue and delivery estimates.
+
+The orders the kitchen is working on (``confirmed`` and ``preparing``) are
+held in an in-process snapshot, built per worker from two queries that only
+touch active orders (the lines carry their dishes' names and prep times), and rebuilt lazily when a version stamp in the shared
+cache changes; orders.status bumps it on every status write, the same scheme
+menu.catalog uses for the menu. The kitchen display and every delivery
+estimate therefore cost O(active orders), never O(all orders).
+
+Queue order: orders already being cooked first, then confirmed orders first
+come, first served.
+
+Estimates treat the kitchen as ``KITCHEN_COOKS`` cooks sharing the work.
+An order's work is the sum of ``FoodItem.prep_minutes`` over its portions,
+and an order already ``preparing`` is counted as half done. A new order waits
+for the backlog ahead of it to be shared out, then takes the longer of its
+own slowest dish and its own work shared out, then travels for
+``DELIVERY_MINUTES``. Once a delivery-time model has been trained
+(orders.eta), an estimate is never earlier than what history says such an
+order takes at that hour.
+"""
+import threading
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from . import eta
+from .models import Order, OrderItem
+
+VERSION_CACHE_KEY = 'orders:kitchen:version'
+ACTIVE_STATUSES = ('preparing', 'confirmed')
+PREPARING_REMAINING = 0.5
+
+_queue = None
+_lock = threading.Lock()
+
+
+class QueuedOrder:
+    """One active order as the kitchen sees it"""
+
+    __slots__ = ('order_number', 'status', 'created_at', 'lines', 'work_minutes', 'longest_minutes', 'ready_at')
+
+    def __init__(self, order, lines):
+        self.order_number = order.order_number
+        self.status = order.status
+        self.created_at = order.created_at
+        self.lines = lines  # [(name, quantity)]
+        self.ready_at = None
+
+
+class KitchenQueue:
+    """Active orders in cooking order, with the backlog they add up to"""
+
+    def __init__(self, version, orders, lines_by_order):
+        self.version = version
+        self.built_at = timezone.now()
+        cooks = settings.KITCHEN_COOKS
+
+        queued = []
+        for order in sorted(orders, key=priority):
+            lines, work, longest = [], 0, 0
+            for name, quantity, minutes in lines_by_order.get(order.pk, ()):
+                lines.append((name, quantity))
+                work += minutes * quantity
+                longest = max(longest, minutes)
+            entry = QueuedOrder(order, lines)
+            remaining = PREPARING_REMAINING if order.status == 'preparing' else 1
+            entry.work_minutes = work * remaining
+            entry.longest_minutes = longest * remaining
+            queued.append(entry)
+
+        # Each order is ready once the work ahead of it and its own is done
+        backlog = 0
+        for entry in queued:
+            own = cook_minutes(entry.work_minutes, entry.longest_minutes, cooks)
+            entry.ready_at = self.built_at + timedelta(minutes=backlog / cooks + own)
+            backlog += entry.work_minutes
+        self.orders = tuple(queued)
+        self.backlog_minutes = backlog
+
+    def wait_minutes(self, now):
+        """Minutes from ``now`` until the cooks are free for a new order"""
+        elapsed = max((now - self.built_at).total_seconds() / 60, 0)
+        return max(self.backlog_minutes / settings.KITCHEN_COOKS - elapsed, 0)
+
+    def to_dict(self):
+        return {
+            'built_at': self.built_at.isoformat(),
+            'cooks': settings.KITCHEN_COOKS,
+            'backlog_minutes': round(self.backlog_minutes, 1),
+            'orders': [
+                {
+                    'order_number': entry.order_number,
+                    'status': entry.status,
+                    'created_at': entry.created_at.isoformat(),
+                    'items': [{'name': name, 'quantity': quantity} for name, quantity in entry.lines],
+                    'work_minutes': round(entry.work_minutes, 1),
+                    'ready_at': entry.ready_at.isoformat(),
+                }
+                for entry in self.orders
+            ],
+        }
+
+
+def priority(order):
+    return (ACTIVE_STATUSES.index(order.status), order.created_at, order.pk)
+
+
+def cook_minutes(work, longest, cooks):
+    """Time to cook one order's dishes with every cook free"""
+    return max(longest, work / cooks)
+
+
+def current_version():
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(VERSION_CACHE_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(VERSION_CACHE_KEY)
+    return version
+
+
+def bump_version():
+    """Make every worker rebuild its queue once the current transaction commits"""
+    transaction.on_commit(
+        lambda: cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, timeout=None)
+    )
+
+
+def build_queue(version):
+    """Load the active orders and their lines: two queries"""
+    orders = list(
+        Order.objects.filter(status__in=ACTIVE_STATUSES)
+        .only('order_number', 'status', 'created_at')
+    )
+    lines_by_order = {}
+    rows = OrderItem.objects.filter(order_id__in=[order.pk for order in orders]).values_list(
+        'order_id', 'food_item__name', 'quantity', 'food_item__prep_minutes',
+    )
+    for order_id, name, quantity, minutes in rows:
+        lines_by_order.setdefault(order_id, []).append((name, quantity, minutes))
+    return KitchenQueue(version, orders, lines_by_order)
+
+
+def get_queue():
+    """Return the queue for the current version, rebuilding it if stale"""
+    global _queue
+    version = current_version()
+    queue = _queue
+    if queue is None or queue.version != version:
+        with _lock:
+            queue = _queue
+            if queue is None or queue.version != version:
+                queue = _queue = build_queue(version)
+    return queue
+
+
+def estimate_delivery(lines, now=None):
+    """
+    When an order of ``lines`` (anything with ``food_item`` and ``quantity``)
+    placed ``now`` should arrive, given the current kitchen queue.
+    """
+    now = now or timezone.now()
+    work = sum(line.food_item.prep_minutes * line.quantity for line in lines)
+    longest = max((line.food_item.prep_minutes for line in lines), default=0)
+    cooks = settings.KITCHEN_COOKS
+    minutes = get_queue().wait_minutes(now) + cook_minutes(work, longest, cooks) + settings.DELIVERY_MINUTES
+    estimate = now + timedelta(minutes=minutes)
+    learned = eta.predict_delivery(lines, now)
+    return max(estimate, learned) if learned else estimate
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from orders import archive
+
+
+class Command(BaseCommand):
+    help = 'Move delivered and cancelled orders past their retention age into the archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.ORDER_ARCHIVE_DAYS,
+                            help=f'Archive orders placed more than this many days ago (default {settings.ORDER_ARCHIVE_DAYS})')
+        parser.add_argument('--batch-size', type=int, default=settings.ORDER_ARCHIVE_BATCH,
+                            help=f'Orders moved per transaction (default {settings.ORDER_ARCHIVE_BATCH})')
+        parser.add_argument('--pause', type=float, default=0.05,
+                            help='Seconds to sleep between batches so other writers get in')
+
+    def handle(self, *args, **options):
+        archived = archive.archive_orders(options['days'], options['batch_size'], options['pause'])
+        self.stdout.write(self.style.SUCCESS(f'Archived {archived} orders.'))
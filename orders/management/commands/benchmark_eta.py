@@ -0,0 +1,72 @@
+import os
+import random
+import tempfile
+import time
+from contextlib import nullcontext
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from orders import eta
+
+
+def synthetic_model(categories=20):
+    """A model with random coefficients over ``categories`` categories"""
+    rng = random.Random(0)
+    coef = [rng.uniform(-5, 5) for _ in range(eta.CATEGORY_OFFSET + categories)]
+    return eta.DeliveryModel(coef, range(1, categories + 1))
+
+
+def synthetic_lines(category_ids, size):
+    """``size`` checkout lines (``food_item.category_id`` and ``quantity``) over ``category_ids``"""
+    return [
+        SimpleNamespace(
+            food_item=SimpleNamespace(category_id=category_ids[i % len(category_ids)]),
+            quantity=1 + i % 3,
+        )
+        for i in range(size)
+    ]
+
+
+def time_predictions(lines, repeat):
+    """
+    Seconds per ``predict_delivery`` call, the path checkout takes (model
+    freshness check, local time, prediction), and the queries it ran
+    """
+    when = timezone.now()
+    with CaptureQueriesContext(connection) as ctx:
+        start = time.perf_counter()
+        for i in range(repeat):
+            eta.predict_delivery(lines, when)
+        elapsed = (time.perf_counter() - start) / repeat
+    return elapsed, len(ctx.captured_queries)
+
+
+class Command(BaseCommand):
+    help = 'Time delivery-time predictions at growing basket sizes and count their queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1, 3, 10, 30])
+        parser.add_argument('--repeat', type=int, default=100000)
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as tmp:
+            model = eta.get_model()
+            settings_override = nullcontext()
+            if model is None:
+                # No trained model yet: time a synthetic one through the same path
+                model = synthetic_model()
+                path = os.path.join(tmp, 'eta.npz')
+                model.save(path)
+                settings_override = override_settings(ETA_MODEL_PATH=path)
+            categories = model.category_ids or [1]
+            self.stdout.write(f"{'lines':>8} {'ns/call':>10} {'queries':>8}")
+            with settings_override:
+                for size in options['sizes']:
+                    lines = synthetic_lines(categories, size)
+                    elapsed, queries = time_predictions(lines, options['repeat'])
+                    self.stdout.write(f'{size:>8} {elapsed * 1e9:>10.0f} {queries:>8}')
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from orders import eta
+
+
+class Command(BaseCommand):
+    help = 'Fit the delivery-time model on delivered orders and store its coefficients'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ridge', type=float, default=eta.RIDGE,
+                            help=f'L2 penalty on the coefficients (default {eta.RIDGE})')
+        parser.add_argument('--holdout', type=float, default=0.2,
+                            help='Share of the newest orders scored before the final fit')
+
+    def handle(self, *args, **options):
+        model, rows, mae = eta.train(options['ridge'], options['holdout'])
+        if model is None:
+            self.stdout.write(self.style.WARNING(
+                f'Only {rows} delivered orders; not enough to fit the model.'
+            ))
+            return
+        model.save(settings.ETA_MODEL_PATH)
+        score = f', holdout error {mae:.1f} min' if mae is not None else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'Fitted {len(model.coef)} coefficients on {rows} orders{score}.'
+        ))
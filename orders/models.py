@@ -1,3 +1,4 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.contrib.auth.models import User
 from menu.models import FoodItem
@@ -38,11 +39,30 @@ class Order(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     estimated_delivery = models.DateTimeField(null=True, blank=True)
     
+    # Bumped by every status write; see orders.status
+    version = models.PositiveIntegerField(default=0, editable=False)
+    
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='orders_user_created_idx'),
+            models.Index(fields=['status', '-created_at'], name='orders_status_created_idx'),
+        ]
     
     def __str__(self):
         return f"Order {self.order_number} - {self.user.username}"
+    
+    def status_options(self):
+        """The current status and those it may move to, as choices"""
+        from .status import TRANSITIONS
+        allowed = TRANSITIONS[self.status] | {self.status}
+        return [(value, label) for value, label in self.STATUS_CHOICES if value in allowed]
+    
+    def line_items(self):
+        """Items with just the columns the order pages show, in one query"""
+        # ``order`` stays loaded so the related manager can attach ``self`` to
+        # each item instead of fetching its order again
+        return self.items.select_related('food_item').only('order', 'quantity', 'price', 'food_item__name')
 
 
 class OrderItem(models.Model):
@@ -57,3 +77,94 @@ class OrderItem(models.Model):
     
     def __str__(self):
         return f"{self.food_item.name} x {self.quantity}"
+
+
+class OrderStatusEvent(models.Model):
+    """Append-only log of order status changes"""
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='status_events')
+    from_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    to_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    version = models.PositiveIntegerField()  # Order.version after the change
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['order', 'version']
+        constraints = [
+            models.UniqueConstraint(fields=['order', 'version'], name='orders_statusevent_order_version'),
+        ]
+    
+    def __str__(self):
+        return f"{self.order_id}: {self.from_status} -> {self.to_status}"
+
+
+class ArchivedOrder(models.Model):
+    """
+    A finished order moved out of the hot tables by orders.archive. The
+    columns the order pages filter and list on are kept; the full order, its
+    items, payment and status events are kept in ``data``. Users and food
+    items are plain ids so the archive can live in its own database.
+    """
+    id = models.BigIntegerField(primary_key=True)  # The original Order id
+    order_number = models.CharField(max_length=20, unique=True)
+    user_id = models.IntegerField()
+    total_price = models.DecimalField(max_digits=10, decimal_places=2)
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    payment_status = models.CharField(max_length=20)
+    created_at = models.DateTimeField()
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user_id', '-created_at', '-id'], name='orders_archive_user_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Archived order {self.order_number}"
+    
+    def as_order(self):
+        """An unsaved Order rebuilt from the archive, for the order pages"""
+        fields = {
+            field.attname: field.to_python(self.data['order'][field.attname])
+            for field in Order._meta.concrete_fields
+            if field.attname in self.data['order']
+        }
+        return Order(**fields)
+    
+    def line_items(self, order=None):
+        """Unsaved OrderItems of ``order`` (default: as_order()) with the columns the order pages show"""
+        order = order or self.as_order()
+        return [
+            OrderItem(
+                order=order,
+                food_item=FoodItem(pk=item['food_item_id'], name=item['name']),
+                quantity=item['quantity'],
+                price=OrderItem._meta.get_field('price').to_python(item['price']),
+            )
+            for item in self.data['items']
+        ]
+
+
+class ArchiveStats(models.Model):
+    """Running totals of the archived orders of one status, for the dashboard"""
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES, unique=True)
+    orders = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)  # Completed payments
+    
+    class Meta:
+        verbose_name_plural = "Archive stats"
+    
+    def __str__(self):
+        return f"{self.status}: {self.orders} archived orders"
+
+
+class ArchivedItemTotal(models.Model):
+    """Portions of one food item sold in archived orders, for the analytics page"""
+    food_item_id = models.BigIntegerField(unique=True)
+    name = models.CharField(max_length=100)
+    quantity = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.name} x {self.quantity}"
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+ARCHIVE_MODELS = {'orders.archivedorder', 'orders.archivestats', 'orders.archiveditemtotal'}
+
+
+class ArchiveRouter:
+    """Sends the order archive models to ``settings.ORDER_ARCHIVE_DATABASE``"""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.label_lower in ARCHIVE_MODELS:
+            return settings.ORDER_ARCHIVE_DATABASE
+        return None
+
+    db_for_write = db_for_read
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        archive_db = settings.ORDER_ARCHIVE_DATABASE
+        if archive_db == DEFAULT_DB_ALIAS or model_name is None:
+            return None
+        if f'{app_label}.{model_name}' in ARCHIVE_MODELS:
+            return db == archive_db
+        # Nothing else belongs in the archive database
+        return False if db == archive_db else None
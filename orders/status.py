@@ -0,0 +1,99 @@
+"""
+Order status state machine.
+
+Every status change goes through ``transition``, which checks the move
+against ``TRANSITIONS`` and writes it as a compare-and-set:
+
+    UPDATE orders_order SET status = ..., version = version + 1, ...
+    WHERE id = ... AND version = <the version that was read>
+
+Only the changed columns are written, and nothing is locked. If a customer
+and the kitchen act on the same order at once, the later writer matches no
+row and gets ``StaleOrder`` instead of silently overwriting the other change.
+Each successful change appends an OrderStatusEvent in the same transaction
+and is pushed to listening pages once it commits (orders.events).
+"""
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import kitchen
+from .events import publish_order
+from .models import Order, OrderStatusEvent
+
+TRANSITIONS = {
+    'pending': {'confirmed', 'cancelled'},
+    'confirmed': {'preparing', 'cancelled'},
+    'preparing': {'ready', 'delivered', 'cancelled'},
+    'ready': {'delivered'},
+    'delivered': set(),
+    'cancelled': set(),
+}
+
+# Customers may cancel until the kitchen starts cooking
+CUSTOMER_CANCELLABLE = {'pending', 'confirmed'}
+
+
+class InvalidTransition(ValueError):
+    """Raised when a status change is not allowed from the current status"""
+
+
+class StaleOrder(Exception):
+    """Raised when the order changed since it was read"""
+
+
+def can_transition(from_status, to_status):
+    return to_status in TRANSITIONS.get(from_status, ())
+
+
+def compare_and_set(order, **changes):
+    """
+    Write ``changes`` to the order only if its version is still the one that
+    was read, and apply them to ``order`` in memory. Raises StaleOrder when
+    another writer got there first.
+    """
+    changes['updated_at'] = timezone.now()
+    updated = Order.objects.filter(pk=order.pk, version=order.version).update(
+        version=F('version') + 1, **changes
+    )
+    if not updated:
+        raise StaleOrder(f'Order {order.order_number} was changed by someone else')
+    for name, value in changes.items():
+        setattr(order, name, value)
+    order.version += 1
+    if 'status' in changes:
+        kitchen.bump_version()
+    publish_order(order)
+    return order
+
+
+def transition(order, to_status, actor=None, **changes):
+    """Move ``order`` to ``to_status``, logging the change; extra fields ride along"""
+    from_status = order.status
+    if not can_transition(from_status, to_status):
+        raise InvalidTransition(f'Cannot move an order from {from_status} to {to_status}')
+    with transaction.atomic():
+        compare_and_set(order, status=to_status, **changes)
+        OrderStatusEvent.objects.create(
+            order=order,
+            from_status=from_status,
+            to_status=to_status,
+            version=order.version,
+            actor=actor,
+        )
+    return order
+
+
+def retry_stale(apply, order, attempts=3):
+    """
+    Call ``apply(order)``, re-reading the order and trying again when a
+    concurrent writer made it stale. For writers like payment callbacks that
+    must land whatever the staff did in between.
+    """
+    for attempt in range(attempts):
+        try:
+            return apply(order)
+        except StaleOrder:
+            if attempt == attempts - 1:
+                raise
+            order.refresh_from_db(fields=['status', 'payment_status', 'version'])
@@ -2,26 +2,56 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.views.decorators.http import require_http_methods
-from django.utils import timezone
-from datetime import timedelta
-from decimal import Decimal
-import uuid
-from cart.models import Cart, CartItem
-from .models import Order, OrderItem
+from django.db import transaction
+from Base_app.ids import new_id
+from Base_app.pagination import InvalidCursor, paginate_queryset
+from cart.models import CartItem
+from cart.pricing import TAX_PERCENT, Quote, QuoteLine
+from cart.views import get_user_cart
+from . import kitchen
+from .events import event_stream_response, publish_order, user_channel
+from .models import ArchivedOrder, Order, OrderItem
+from .status import CUSTOMER_CANCELLABLE, StaleOrder, transition
 from menu.models import FoodItem
 
 
+ORDERS_PER_PAGE = 20
+HISTORY_KEY = ['created_at', 'pk']
+HISTORY_FIELDS = ['order_number', 'total_price', 'status', 'payment_status', 'created_at']
+
+
 def generate_order_number():
     """Generate unique order number"""
-    return f"ORD-{uuid.uuid4().hex[:8].upper()}"
+    return new_id('ORD-')
 
 
 @login_required(login_url='login')
 def my_orders(request):
-    """View user's orders"""
-    user_orders = Order.objects.filter(user=request.user)
+    """
+    View user's orders, newest first, one keyset page at a time. Orders moved
+    to the archive (orders.archive) are listed separately with ``?archived=1``.
+    """
+    archived = request.GET.get('archived') == '1'
+    if archived:
+        user_orders = ArchivedOrder.objects.filter(user_id=request.user.pk).only(*HISTORY_FIELDS)
+    else:
+        user_orders = Order.objects.filter(user=request.user).only(*HISTORY_FIELDS)
+    cursor = request.GET.get('cursor')
+    try:
+        page = paginate_queryset(user_orders, HISTORY_KEY, cursor, ORDERS_PER_PAGE)
+    except InvalidCursor:
+        cursor = None
+        page = paginate_queryset(user_orders, HISTORY_KEY, cursor, ORDERS_PER_PAGE)
     context = {
-        'orders': user_orders,
+        'orders': page.items,
+        'next_cursor': page.next_cursor,
+        'is_first_page': not cursor,
+        'archived': archived,
+        # Offered once the recent history runs out
+        'has_archive': (
+            not archived and not page.next_cursor
+            and ArchivedOrder.objects.filter(user_id=request.user.pk).exists()
+        ),
     }
     return render(request, 'my_orders.html', context)
 
@@ -30,83 +60,107 @@ def my_orders(request):
 @require_http_methods(["GET", "POST"])
 def create_order(request):
     """Create order from cart"""
-    cart = Cart.objects.get(user=request.user)
-    
-    if not cart.items.exists():
-        messages.error(request, 'Your cart is empty!')
-        return redirect('view_cart')
-    
     if request.method == 'POST':
         delivery_address = request.POST.get('delivery_address')
         phone = request.POST.get('phone')
         special_instructions = request.POST.get('special_instructions', '')
         payment_method = request.POST.get('payment_method', 'razorpay')
         
-        # Create order
-        total_price = cart.get_total()
-        order = Order.objects.create(
-            user=request.user,
-            order_number=generate_order_number(),
-            total_price=total_price,
-            delivery_address=delivery_address,
-            phone=phone,
-            special_instructions=special_instructions,
-            payment_method=payment_method,
-            estimated_delivery=timezone.now() + timedelta(minutes=30)
-        )
-        
-        # Create order items from cart
-        for cart_item in cart.items.all():
-            OrderItem.objects.create(
-                order=order,
-                food_item=cart_item.food_item,
-                quantity=cart_item.quantity,
-                price=cart_item.food_item.price
+        # Read, write and clear in one transaction with the cart row locked,
+        # so a failure never leaves half an order and a double submit waits
+        with transaction.atomic():
+            cart = get_user_cart(request.user, lock=True)
+            cart_items = list(cart.items.select_related('food_item'))
+            if not cart_items:
+                messages.error(request, 'Your cart is empty!')
+                return redirect('view_cart')
+            
+            quote = Quote([QuoteLine(cart_item.food_item, cart_item.quantity) for cart_item in cart_items])
+            order = Order.objects.create(
+                user=request.user,
+                order_number=generate_order_number(),
+                total_price=quote.subtotal,
+                delivery_address=delivery_address,
+                phone=phone,
+                special_instructions=special_instructions,
+                payment_method=payment_method,
+                estimated_delivery=kitchen.estimate_delivery(quote.lines),
             )
-        
-        # Clear cart
-        CartItem.objects.filter(cart=cart).delete()
+            OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=order,
+                    food_item=line.food_item,
+                    quantity=line.quantity,
+                    price=line.unit_price,
+                )
+                for line in quote.lines
+            ])
+            CartItem.objects.filter(cart=cart).delete()
+            cart.reset_totals()
+            publish_order(order)
         
         messages.success(request, 'Order created successfully!')
         return redirect('checkout', order_number=order.order_number)
     
-    subtotal = cart.get_total()
-    delivery_fee = Decimal('50.00')
-    tax = round((subtotal + delivery_fee) * Decimal('0.05'), 2)
-    grand_total = subtotal + delivery_fee + tax
+    cart = get_user_cart(request.user)
+    quote = cart.quote()
+    if not quote.lines:
+        messages.error(request, 'Your cart is empty!')
+        return redirect('view_cart')
     
     context = {
         'cart': cart,
-        'total': subtotal,
-        'delivery_fee': delivery_fee,
-        'tax': tax,
-        'grand_total': grand_total,
+        'items': quote.lines,
+        'total': quote.subtotal,
+        'delivery_fee': quote.delivery_fee,
+        'tax': quote.tax,
+        'tax_percent': TAX_PERCENT,
+        'grand_total': quote.grand_total,
     }
     return render(request, 'checkout.html', context)
 
 
 @login_required(login_url='login')
 def order_detail(request, order_number):
-    """View order details"""
-    order = get_object_or_404(Order, order_number=order_number, user=request.user)
+    """View order details, falling back to the archive for old orders"""
+    order = Order.objects.filter(order_number=order_number, user=request.user).first()
+    if order is None:
+        archived = get_object_or_404(ArchivedOrder, order_number=order_number, user_id=request.user.pk)
+        order = archived.as_order()
+        items = archived.line_items(order)
+    else:
+        items = order.line_items()
     context = {
         'order': order,
-        'items': order.items.all(),
+        'items': items,
+        'can_cancel': order.status in CUSTOMER_CANCELLABLE,
+        'cancellable': ','.join(sorted(CUSTOMER_CANCELLABLE)),
     }
     return render(request, 'order_detail.html', context)
 
 
+@login_required(login_url='login')
+@require_http_methods(["GET"])
+async def order_events(request):
+    """Server-Sent Events stream of the user's order status changes"""
+    user = await request.auser()
+    return event_stream_response(request, user_channel(user.pk))
+
+
 @login_required(login_url='login')
 @require_http_methods(["POST"])
 def cancel_order(request, order_number):
     """Cancel order"""
     order = get_object_or_404(Order, order_number=order_number, user=request.user)
     
-    if order.status not in ['pending', 'confirmed']:
+    if order.status not in CUSTOMER_CANCELLABLE:
         messages.error(request, 'Cannot cancel this order!')
         return redirect('order_detail', order_number=order_number)
     
-    order.status = 'cancelled'
-    order.save()
+    try:
+        transition(order, 'cancelled', actor=request.user)
+    except StaleOrder:
+        messages.error(request, 'Your order was just updated by the restaurant. Please check its status and try again.')
+        return redirect('order_detail', order_number=order_number)
     messages.success(request, 'Order cancelled successfully!')
     return redirect('order_detail', order_number=order_number)
@@ -0,0 +1,234 @@
+"""
+Payment gateway client.
+
+Each worker process keeps one gateway client for its whole life
+(``get_gateway``) instead of building a ``razorpay.Client`` per request:
+
+- Calls go through one ``requests.Session`` with a pooled HTTPAdapter, so
+  payments reuse a kept-alive TLS connection instead of paying for a new
+  handshake each time. The session is rebuilt after a fork, so no pooled
+  socket is ever shared between processes.
+- Every call has a connect and a read timeout, so a slow gateway costs a
+  worker seconds, not forever.
+- Connection failures, timeouts and 429/5xx answers are retried a bounded
+  number of times after a "full jitter" backoff, so workers that failed
+  together do not retry together. A Razorpay order only records an intent
+  to pay, so a retry that leaves a duplicate behind is harmless: the
+  customer pays the one returned.
+- Each call's latency, retries and outcome go into ``GatewayMetrics``,
+  shown per worker on the analytics page.
+
+Payment signatures are checked locally, as the Razorpay SDK does: an
+HMAC-SHA256 of ``"<order_id>|<payment_id>"`` under the key secret.
+
+``settings.PAYMENT_GATEWAY`` names the class and
+``PAYMENT_GATEWAY_OPTIONS`` its keyword arguments. ``FakeGateway`` serves
+the same ``create_order``/``verify_payment_signature`` API in process, with
+optional latency and failures, so load tests and CI run without the network;
+its ``pay`` stands in for a customer completing Razorpay's checkout.
+"""
+import hashlib
+import hmac
+import os
+import random
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+except ImportError:
+    requests = None
+
+API_URL = 'https://api.razorpay.com/v1'
+TIMEOUT = (3.05, 10)  # Seconds to connect, seconds between bytes read
+RETRIES = 2
+POOL_SIZE = 10
+BACKOFF_SECONDS = 0.2
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+LATENCY_SAMPLES = 1000
+
+
+class GatewayError(Exception):
+    """Raised when the gateway cannot be reached or refuses a call"""
+
+
+class GatewayMetrics:
+    """Thread-safe call counters and recent latencies of one gateway"""
+
+    def __init__(self, samples=LATENCY_SAMPLES):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self._latencies = deque(maxlen=samples)
+        self._lock = threading.Lock()
+
+    def record(self, seconds, ok, retries=0):
+        with self._lock:
+            self.calls += 1
+            self.retries += retries
+            if not ok:
+                self.errors += 1
+            self._latencies.append(seconds)
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {'calls': self.calls, 'errors': self.errors, 'retries': self.retries}
+
+        def percentile(share):
+            if not latencies:
+                return 0
+            return round(1000 * latencies[min(int(share * len(latencies)), len(latencies) - 1)], 1)
+
+        stats.update(p50_ms=percentile(0.5), p95_ms=percentile(0.95), max_ms=percentile(1))
+        return stats
+
+
+class Gateway(ABC):
+    """What every gateway shares: keys, signature checks and metrics"""
+
+    def __init__(self, key_id=None, key_secret=None):
+        self.key_id = key_id or settings.RAZORPAY_KEY_ID
+        self.key_secret = key_secret or settings.RAZORPAY_KEY_SECRET
+        self.metrics = GatewayMetrics()
+
+    def signature(self, order_id, payment_id):
+        message = f'{order_id}|{payment_id}'.encode()
+        return hmac.new(self.key_secret.encode(), message, hashlib.sha256).hexdigest()
+
+    def verify_payment_signature(self, order_id, payment_id, signature):
+        """Whether the gateway signed ``payment_id`` as paying ``order_id``"""
+        if not (order_id and payment_id and signature):
+            return False
+        return hmac.compare_digest(self.signature(order_id, payment_id), signature)
+
+    @abstractmethod
+    def create_order(self, amount, currency='INR', receipt=''):
+        """Create a gateway order for ``amount`` in the currency's smallest unit"""
+
+
+class RazorpayGateway(Gateway):
+    """Razorpay's REST API over a pooled, timed, retrying session"""
+
+    def __init__(self, key_id=None, key_secret=None, api_url=API_URL,
+                 timeout=TIMEOUT, retries=RETRIES, pool_size=POOL_SIZE):
+        if requests is None:
+            raise ImproperlyConfigured('RazorpayGateway needs the requests package')
+        super().__init__(key_id, key_secret)
+        self.api_url = api_url.rstrip('/')
+        self.timeout = tuple(timeout) if isinstance(timeout, (list, tuple)) else timeout
+        self.retries = retries
+        self.pool_size = pool_size
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    session = requests.Session()
+                    session.auth = (self.key_id, self.key_secret)
+                    # Retries are ours, so they are jittered and counted
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session, self._pid = session, os.getpid()
+        return self._session
+
+    def request(self, method, path, payload=None):
+        """Make one API call, retrying transient failures; returns the JSON body"""
+        url = f'{self.api_url}/{path}'
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                response = self.session.request(method, url, json=payload, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                error = GatewayError(f'Payment gateway unreachable: {exc}')
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    break
+                error = GatewayError(f'Payment gateway answered {response.status_code}')
+            if attempt == self.retries:
+                self.metrics.record(time.perf_counter() - start, False, attempt)
+                raise error
+            attempt += 1
+            time.sleep(random.uniform(0, BACKOFF_SECONDS * 2 ** attempt))
+
+        self.metrics.record(time.perf_counter() - start, response.ok, attempt)
+        if not response.ok:
+            raise GatewayError(f'Payment gateway refused the call: {response.status_code} {response.text[:200]}')
+        try:
+            return response.json()
+        except ValueError:
+            raise GatewayError('Payment gateway sent an unreadable answer')
+
+    def create_order(self, amount, currency='INR', receipt=''):
+        return self.request('POST', 'orders', {'amount': amount, 'currency': currency, 'receipt': receipt})
+
+
+class FakeGateway(Gateway):
+    """
+    In-process stand-in for Razorpay. Each call sleeps ``latency`` seconds
+    and fails with GatewayError at ``failure_rate``.
+    """
+
+    def __init__(self, key_id=None, key_secret=None, latency=0.0, failure_rate=0.0):
+        super().__init__(key_id, key_secret)
+        self.latency = latency
+        self.failure_rate = failure_rate
+
+    def create_order(self, amount, currency='INR', receipt=''):
+        start = time.perf_counter()
+        if self.latency:
+            time.sleep(self.latency)
+        failed = random.random() < self.failure_rate
+        self.metrics.record(time.perf_counter() - start, not failed)
+        if failed:
+            raise GatewayError('Payment gateway answered 503')
+        return {
+            'id': f'order_{uuid.uuid4().hex[:14]}',
+            'entity': 'order',
+            'amount': amount,
+            'amount_paid': 0,
+            'amount_due': amount,
+            'currency': currency,
+            'receipt': receipt,
+            'status': 'created',
+            'attempts': 0,
+            'created_at': int(time.time()),
+        }
+
+    def pay(self, order_id):
+        """The fields Razorpay's checkout posts back once ``order_id`` is paid"""
+        payment_id = f'pay_{uuid.uuid4().hex[:14]}'
+        return {
+            'razorpay_order_id': order_id,
+            'razorpay_payment_id': payment_id,
+            'razorpay_signature': self.signature(order_id, payment_id),
+        }
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    """The process-wide gateway built from ``settings.PAYMENT_GATEWAY``"""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                gateway_class = import_string(settings.PAYMENT_GATEWAY)
+                _gateway = gateway_class(**settings.PAYMENT_GATEWAY_OPTIONS)
+    return _gateway
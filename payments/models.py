@@ -29,6 +29,10 @@ class Payment(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='payments_status_created_idx'),
+            models.Index(fields=['razorpay_order_id'], name='payments_razorpay_order_idx'),
+        ]
     
     def __str__(self):
         return f"Payment for Order {self.order.order_number} - {self.status}"
@@ -0,0 +1,137 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import perf_counter, sleep
+
+from django.contrib.auth.models import User
+
+from Base_app.testing import PageTestCase
+from orders.models import Order
+from payments import gateway as payment_gateway
+from payments.models import Payment
+
+
+class GatewayStub(BaseHTTPRequestHandler):
+    """Answers gateway calls with the server's queued statuses, then 200"""
+    protocol_version = 'HTTP/1.1'  # Keep connections alive, as Razorpay does
+
+    def handle(self):
+        # Timeout tests hang up on purpose; don't print the broken pipe
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.connections.add(self.client_address)
+        self.server.calls += 1
+        if self.server.delay:
+            sleep(self.server.delay)
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+        payload = json.dumps({'id': f'order_stub{self.server.calls}', **body}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class PaymentGatewayTests(PageTestCase):
+    """Payments use one pooled, bounded gateway client, or the fake one"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('payer', 'payer@example.com', 'pass')
+
+    def setUp(self):
+        self.addCleanup(setattr, payment_gateway, '_gateway', payment_gateway._gateway)
+        self.addCleanup(setattr, payment_gateway, 'BACKOFF_SECONDS', payment_gateway.BACKOFF_SECONDS)
+        payment_gateway.BACKOFF_SECONDS = 0.01
+
+    def stub_server(self, statuses=(), delay=0):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), GatewayStub)
+        server.statuses, server.delay = list(statuses), delay
+        server.connections, server.calls = set(), 0
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server, f'http://127.0.0.1:{server.server_port}/v1'
+
+    def test_retries_transient_failures_on_one_connection(self):
+        server, url = self.stub_server(statuses=[503, 502])
+        client = payment_gateway.RazorpayGateway('key', 'secret', api_url=url, retries=2)
+        order = client.create_order(9900, receipt='ORD-1')
+        self.assertEqual((order['amount'], order['receipt']), (9900, 'ORD-1'))
+        client.create_order(100)
+        self.assertEqual(server.calls, 4)
+        self.assertEqual(len(server.connections), 1)
+        stats = client.metrics.stats()
+        self.assertEqual((stats['calls'], stats['errors'], stats['retries']), (2, 0, 2))
+
+    def test_timeouts_and_retries_are_bounded(self):
+        server, url = self.stub_server(delay=1)
+        client = payment_gateway.RazorpayGateway('key', 'secret', api_url=url, timeout=(1, 0.1), retries=1)
+        start = perf_counter()
+        with self.assertRaises(payment_gateway.GatewayError):
+            client.create_order(9900)
+        self.assertLess(perf_counter() - start, 0.9)
+        stats = client.metrics.stats()
+        self.assertEqual((stats['calls'], stats['errors'], stats['retries']), (1, 1, 1))
+
+    def test_razorpay_checkout_against_fake_gateway(self):
+        fake = payment_gateway.FakeGateway('key', 'secret')
+        payment_gateway._gateway = fake
+        order = Order.objects.create(
+            user=self.user, order_number='ORD-PAY0001', total_price='249.50',
+            delivery_address='8 Lane', phone='2222222222',
+        )
+        self.client.force_login(self.user)
+        response = self.client.post('/payment/process/', {'order_number': order.order_number})
+        self.assertEqual(response.status_code, 200)
+        payment = Payment.objects.get(order=order)
+        self.assertEqual(response.context['amount'], 24950)
+        self.assertContains(response, f'data-order-id="{payment.razorpay_order_id}"')
+
+        forged = dict(fake.pay(payment.razorpay_order_id), razorpay_signature='0' * 64)
+        response = self.client.post('/payment/verify/', data=json.dumps(forged), content_type='application/json')
+        self.assertFalse(response.json()['success'])
+
+        paid = fake.pay(payment.razorpay_order_id)
+        response = self.client.post('/payment/verify/', data=json.dumps(paid), content_type='application/json')
+        self.assertTrue(response.json()['success'])
+        order.refresh_from_db()
+        self.assertEqual((order.status, order.payment_status), ('confirmed', 'completed'))
+
+    def test_gateway_outage_sends_customer_back_to_checkout(self):
+        payment_gateway._gateway = payment_gateway.FakeGateway('key', 'secret', failure_rate=1)
+        order = Order.objects.create(
+            user=self.user, order_number='ORD-PAY0002', total_price='99.00',
+            delivery_address='8 Lane', phone='2222222222',
+        )
+        self.client.force_login(self.user)
+        response = self.client.post('/payment/process/', {'order_number': order.order_number})
+        self.assertRedirects(response, f'/payment/checkout/{order.order_number}/')
+        self.assertFalse(Payment.objects.filter(order=order).exists())
+
+    def test_changing_payment_method_reuses_the_payment(self):
+        payment_gateway._gateway = payment_gateway.FakeGateway('key', 'secret')
+        order = Order.objects.create(
+            user=self.user, order_number='ORD-PAY0003', total_price='120.00',
+            delivery_address='8 Lane', phone='2222222222',
+        )
+        self.client.force_login(self.user)
+        for payment_method in ('razorpay', 'razorpay', 'cash'):
+            response = self.client.post(
+                '/payment/process/', {'order_number': order.order_number, 'payment_method': payment_method},
+            )
+        self.assertRedirects(response, '/payment/success/', fetch_redirect_response=False)
+        payment = Payment.objects.get(order=order)
+        self.assertEqual((payment.payment_method, payment.razorpay_order_id), ('Cash on Delivery', ''))
+
+    def test_gateway_needs_create_order(self):
+        with self.assertRaises(TypeError):
+            payment_gateway.Gateway('key', 'secret')
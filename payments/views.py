@@ -1,8 +1,4 @@
 import json
-import hmac
-import hashlib
-import uuid
-from decimal import Decimal
 
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
@@ -11,16 +7,24 @@ from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.http import JsonResponse
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 
-try:
-    import razorpay
-except ImportError:
-    razorpay = None
-
+from Base_app.ids import new_id
 from orders.models import Order
+from orders.status import compare_and_set, retry_stale, transition
+from .gateway import GatewayError, get_gateway
 from .models import Payment
 
 
+def record_payment(order, payment_status):
+    """Set the order's payment status, confirming it if it is still pending"""
+    def apply(order):
+        if payment_status != 'failed' and order.status == 'pending':
+            return transition(order, 'confirmed', payment_status=payment_status)
+        return compare_and_set(order, payment_status=payment_status)
+    return retry_stale(apply, order)
+
+
 @login_required(login_url='login')
 def checkout(request, order_number):
     """Checkout page"""
@@ -28,7 +32,7 @@ def checkout(request, order_number):
     
     context = {
         'order': order,
-        'items': order.items.all(),
+        'items': order.line_items(),
         'total': order.total_price,
     }
     return render(request, 'payment.html', context)
@@ -43,50 +47,58 @@ def process_payment(request):
         payment_method = request.POST.get('payment_method', 'razorpay')
         
         order = get_object_or_404(Order, order_number=order_number, user=request.user)
+        if order.payment_status == 'completed':
+            messages.info(request, 'This order has already been paid.')
+            return redirect('order_detail', order_number=order_number)
         
+        # An order has one Payment; choosing another method (or retrying)
+        # replaces the attempt that was started before
         if payment_method == 'cash':
-            # Create payment record for cash on delivery
-            transaction_id = f"COD-{uuid.uuid4().hex[:8].upper()}"
-            payment = Payment.objects.create(
-                user=request.user,
+            transaction_id = new_id('COD-')
+            payment, created = Payment.objects.update_or_create(
                 order=order,
-                amount=order.total_price,
-                status='pending',
-                payment_method='Cash on Delivery',
-                transaction_id=transaction_id
+                defaults={
+                    'user': request.user,
+                    'amount': order.total_price,
+                    'status': 'pending',
+                    'payment_method': 'Cash on Delivery',
+                    'razorpay_order_id': '',
+                    'transaction_id': transaction_id,
+                },
             )
-            order.payment_status = 'pending'
-            order.status = 'confirmed'
-            order.save()
+            record_payment(order, 'pending')
             messages.success(request, 'Order confirmed! Please pay at delivery.')
             return redirect('payment_success')
         
-        # Razorpay integration
-        if not razorpay:
+        # Razorpay integration, through this worker's pooled client
+        try:
+            gateway = get_gateway()
+        except ImproperlyConfigured:
             messages.error(request, 'Razorpay not configured. Please use Cash on Delivery.')
             return redirect('checkout', order_number=order_number)
         
-        # Initialize Razorpay client
-        client = razorpay.Client(
-            auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
-        )
-        
         # Create Razorpay order
-        razorpay_order = client.order.create({
-            'amount': int(order.total_price * 100),  # Amount in paise
-            'currency': 'INR',
-            'receipt': order.order_number,
-        })
+        try:
+            razorpay_order = gateway.create_order(
+                amount=int(order.total_price * 100),  # Amount in paise
+                currency='INR',
+                receipt=order.order_number,
+            )
+        except GatewayError:
+            messages.error(request, 'The payment gateway is not responding. Please try again or use Cash on Delivery.')
+            return redirect('checkout', order_number=order_number)
         
-        # Create Payment record
-        transaction_id = f"RAZ-{uuid.uuid4().hex[:8].upper()}"
-        payment = Payment.objects.create(
-            user=request.user,
+        transaction_id = new_id('RAZ-')
+        payment, created = Payment.objects.update_or_create(
             order=order,
-            amount=order.total_price,
-            status='pending',
-            razorpay_order_id=razorpay_order['id'],
-            transaction_id=transaction_id
+            defaults={
+                'user': request.user,
+                'amount': order.total_price,
+                'status': 'pending',
+                'payment_method': '',
+                'razorpay_order_id': razorpay_order['id'],
+                'transaction_id': transaction_id,
+            },
         )
         
         context = {
@@ -117,24 +129,13 @@ def verify_payment(request):
         # Get payment record
         payment = Payment.objects.get(razorpay_order_id=razorpay_order_id)
         
-        # Verify signature
-        if razorpay:
-            client = razorpay.Client(
-                auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
-            )
-            
-            try:
-                client.utility.verify_payment_signature({
-                    'razorpay_order_id': razorpay_order_id,
-                    'razorpay_payment_id': razorpay_payment_id,
-                    'razorpay_signature': razorpay_signature,
-                })
-            except:
-                payment.status = 'failed'
-                payment.save()
-                payment.order.payment_status = 'failed'
-                payment.order.save()
-                return JsonResponse({'success': False, 'message': 'Payment verification failed'})
+        # Verify signature; checked locally, no gateway round trip
+        gateway = get_gateway()
+        if not gateway.verify_payment_signature(razorpay_order_id, razorpay_payment_id, razorpay_signature):
+            payment.status = 'failed'
+            payment.save()
+            record_payment(payment.order, 'failed')
+            return JsonResponse({'success': False, 'message': 'Payment verification failed'})
         
         # Update payment record
         payment.razorpay_payment_id = razorpay_payment_id
@@ -143,10 +144,7 @@ def verify_payment(request):
         payment.save()
         
         # Update order
-        order = payment.order
-        order.payment_status = 'completed'
-        order.status = 'confirmed'
-        order.save()
+        record_payment(payment.order, 'completed')
         
         return JsonResponse({'success': True, 'message': 'Payment verified successfully'})
         
@@ -0,0 +1,75 @@
+// Quantity steppers: changes are batched and sent in one request per pause
+const cartContainer = document.getElementById('cartContainer');
+if (cartContainer) {
+    const batchUrl = cartContainer.getAttribute('data-batch-url');
+    const pending = {};
+    let timer = null;
+
+    function getCookie(name) {
+        const match = document.cookie.split(';').map(c => c.trim()).find(c => c.startsWith(name + '='));
+        return match ? decodeURIComponent(match.substring(name.length + 1)) : null;
+    }
+
+    function flush() {
+        timer = null;
+        const quantities = Object.assign({}, pending);
+        Object.keys(pending).forEach(key => delete pending[key]);
+        if (Object.keys(quantities).length === 0) return;
+        fetch(batchUrl, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-Requested-With': 'XMLHttpRequest',
+                'X-CSRFToken': getCookie('csrftoken') || '',
+            },
+            body: JSON.stringify({quantities: quantities})
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) return;
+            document.querySelectorAll('.cart-item').forEach(row => {
+                const line = data.items[row.getAttribute('data-item-id')];
+                if (line) {
+                    row.querySelector('.line-quantity').textContent = line.quantity;
+                    row.querySelector('.line-total').textContent = line.line_total;
+                } else {
+                    row.remove();
+                }
+            });
+            document.getElementById('cartSubtotal').textContent = data.cart_total;
+            document.getElementById('cartDeliveryFee').textContent = data.delivery_fee;
+            document.getElementById('cartTax').textContent = data.tax;
+            document.getElementById('cartGrandTotal').textContent = data.grand_total;
+            const cartBadge = document.querySelector('.cart-badge');
+            if (cartBadge) {
+                cartBadge.textContent = data.cart_count;
+                cartBadge.style.display = data.cart_count > 0 ? 'inline-block' : 'none';
+            }
+            if (data.cart_count === 0) window.location.reload();
+        })
+        .catch(error => console.error('Error:', error));
+    }
+
+    function queue(row, quantity) {
+        pending[row.getAttribute('data-item-id')] = quantity;
+        clearTimeout(timer);
+        timer = setTimeout(flush, 400);
+    }
+
+    cartContainer.addEventListener('click', function(event) {
+        const btn = event.target.closest('.qty-step');
+        if (!btn) return;
+        const row = btn.closest('.cart-item');
+        const input = row.querySelector('.qty-input');
+        const max = parseInt(input.getAttribute('max'), 10);
+        const quantity = Math.min(max, Math.max(1, (parseInt(input.value, 10) || 1) + parseInt(btn.getAttribute('data-step'), 10)));
+        input.value = quantity;
+        queue(row, quantity);
+    });
+
+    cartContainer.addEventListener('change', function(event) {
+        if (!event.target.classList.contains('qty-input')) return;
+        const quantity = parseInt(event.target.value, 10);
+        if (quantity > 0) queue(event.target.closest('.cart-item'), quantity);
+    });
+}
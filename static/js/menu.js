@@ -0,0 +1,121 @@
+// Add to cart functionality (delegated so cards appended by infinite scroll work too)
+document.getElementById('menuGrid').addEventListener('click', function(event) {
+    const btn = event.target.closest('.add-to-cart-btn');
+    if (btn) {
+        const itemId = btn.getAttribute('data-item-id');
+        const itemName = btn.getAttribute('data-item-name');
+        const baseUrl = '/cart/add/' + itemId + '/';
+
+        // Disable button during request
+        btn.disabled = true;
+        const originalHTML = btn.innerHTML;
+        btn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Adding...';
+
+        // Create form data
+        const formData = new FormData();
+        formData.append('quantity', '1');
+
+        // Send AJAX request
+        function getCookie(name) {
+            let cookieValue = null;
+            if (document.cookie && document.cookie !== '') {
+                const cookies = document.cookie.split(';');
+                for (let i = 0; i < cookies.length; i++) {
+                    const cookie = cookies[i].trim();
+                    if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                        cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                        break;
+                    }
+                }
+            }
+            return cookieValue;
+        }
+        const csrfToken = getCookie('csrftoken') || '';
+        fetch(baseUrl, {
+            method: 'POST',
+            headers: {
+                'X-Requested-With': 'XMLHttpRequest',
+                'X-CSRFToken': csrfToken,
+            },
+            body: formData
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                // Show success message
+                showNotification(itemName + ' added to cart!', 'success');
+                // Update cart count in navbar
+                updateCartCount(data.cart_count);
+            } else {
+                showNotification('Failed to add item to cart', 'error');
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            showNotification('Error adding item to cart', 'error');
+        })
+        .finally(() => {
+            // Re-enable button
+            btn.disabled = false;
+            btn.innerHTML = originalHTML;
+        });
+    }
+});
+
+// Infinite scroll: stream the next keyset page of cards into the grid
+const menuMore = document.getElementById('menuMore');
+if (menuMore) {
+    let loading = false;
+    function loadMore() {
+        const nextUrl = menuMore.getAttribute('data-next-url');
+        if (loading || !nextUrl) return;
+        loading = true;
+        fetch(nextUrl, {headers: {'X-Requested-With': 'XMLHttpRequest'}})
+        .then(response => response.json())
+        .then(data => {
+            document.getElementById('menuGrid').insertAdjacentHTML('beforeend', data.html);
+            if (data.next_url) {
+                menuMore.setAttribute('data-next-url', data.next_url);
+            } else {
+                menuMore.remove();
+            }
+        })
+        .catch(error => console.error('Error:', error))
+        .finally(() => { loading = false; });
+    }
+    document.getElementById('loadMoreBtn').addEventListener('click', loadMore);
+    if ('IntersectionObserver' in window) {
+        new IntersectionObserver(entries => {
+            if (entries[0].isIntersecting) loadMore();
+        }, {rootMargin: '400px'}).observe(menuMore);
+    }
+}
+
+// Show notification toast
+function showNotification(message, type) {
+    if (type === undefined) type = 'success';
+    const alertType = type === 'success' ? 'alert-success' : 'alert-danger';
+    const alertHTML = '<div class="alert ' + alertType + ' alert-dismissible fade show" role="alert" style="position: fixed; top: 20px; right: 20px; z-index: 2000; min-width: 300px; animation: slideIn 0.3s ease;">' + message + '<button type="button" class="btn-close" data-bs-dismiss="alert" aria-label="Close"></button></div>';
+
+    const alertDiv = document.createElement('div');
+    alertDiv.innerHTML = alertHTML;
+    document.body.appendChild(alertDiv.firstElementChild);
+
+    // Auto-dismiss after 3 seconds
+    setTimeout(() => {
+        const alert = document.querySelector('.alert-dismissible:last-of-type');
+        if (alert) {
+            alert.style.animation = 'slideOut 0.3s ease';
+            setTimeout(() => alert.remove(), 300);
+        }
+    }, 3000);
+}
+
+// Update cart count in navbar
+function updateCartCount(count) {
+    const cartBadge = document.querySelector('.cart-badge');
+    if (cartBadge) {
+        cartBadge.textContent = count;
+        cartBadge.style.display = count > 0 ? 'inline-block' : 'none';
+    }
+}
@@ -0,0 +1,74 @@
+// Live order status: applies pushed status changes to the rows on the page
+const eventsRoot = document.querySelector('[data-events-url]');
+if (eventsRoot && window.EventSource) {
+    const flowScript = document.getElementById('statusFlow');
+    const flow = flowScript ? JSON.parse(flowScript.textContent) : null;
+    const statusFilter = eventsRoot.getAttribute('data-status-filter');
+    const statusColours = {delivered: 'success', cancelled: 'danger', preparing: 'warning', ready: 'primary'};
+    const paymentColours = {completed: 'success', failed: 'danger'};
+    const progress = {
+        pending: [25, 'warning'], confirmed: [50, 'info'], preparing: [75, 'warning'],
+        ready: [90, 'primary'], delivered: [100, 'success'], cancelled: [100, 'danger'],
+    };
+    const versions = {};
+
+    function setBadge(element, text, colour) {
+        element.textContent = text;
+        element.className = element.className.replace(/\bbg-\w+/, 'bg-' + colour);
+    }
+
+    function rebuildStatusMenu(select, status) {
+        const allowed = new Set(flow.transitions[status].concat([status]));
+        select.innerHTML = '';
+        flow.choices.forEach(([value, label]) => {
+            if (!allowed.has(value)) return;
+            const option = new Option(label, value, value === status, value === status);
+            select.add(option);
+        });
+    }
+
+    function apply(data) {
+        // Streams can replay an event after a reconnect; keep the newest
+        if (versions[data.order_number] >= data.version) return;
+        versions[data.order_number] = data.version;
+
+        const rows = document.querySelectorAll('[data-order-number="' + data.order_number + '"]');
+        if (rows.length === 0) {
+            const notice = document.querySelector('[data-new-orders]');
+            if (notice && (!statusFilter || statusFilter === data.status)) notice.classList.remove('d-none');
+            return;
+        }
+        rows.forEach(row => {
+            row.querySelectorAll('[data-order-status]').forEach(badge => {
+                setBadge(badge, data.status_display, statusColours[data.status] || 'info');
+            });
+            row.querySelectorAll('[data-order-status-text]').forEach(text => {
+                text.textContent = data.status_display;
+            });
+            row.querySelectorAll('[data-order-progress]').forEach(bar => {
+                const [width, colour] = progress[data.status];
+                bar.style.width = width + '%';
+                setBadge(bar, data.status_display, colour);
+            });
+            row.querySelectorAll('[data-payment-status]').forEach(badge => {
+                const text = data.payment_status.charAt(0).toUpperCase() + data.payment_status.slice(1);
+                setBadge(badge, text, paymentColours[data.payment_status] || 'warning');
+            });
+            row.querySelectorAll('[data-cancellable]').forEach(form => {
+                const cancellable = form.getAttribute('data-cancellable').split(',');
+                form.classList.toggle('d-none', !cancellable.includes(data.status));
+            });
+            row.querySelectorAll('[data-order-version]').forEach(input => {
+                input.value = data.version;
+            });
+            if (flow) {
+                row.querySelectorAll('[data-status-select]').forEach(select => {
+                    rebuildStatusMenu(select, data.status);
+                });
+            }
+        });
+    }
+
+    const source = new EventSource(eventsRoot.getAttribute('data-events-url'));
+    source.addEventListener('order', event => apply(JSON.parse(event.data)));
+}
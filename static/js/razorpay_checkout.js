@@ -0,0 +1,52 @@
+// Razorpay checkout: opens the payment window and verifies the result server-side
+const checkoutRoot = document.getElementById('razorpayCheckout');
+if (checkoutRoot && window.Razorpay) {
+    const data = checkoutRoot.dataset;
+    const message = checkoutRoot.querySelector('[data-payment-message]');
+
+    function verify(response) {
+        message.textContent = 'Verifying your payment…';
+        fetch(data.verifyUrl, {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({
+                razorpay_order_id: response.razorpay_order_id,
+                razorpay_payment_id: response.razorpay_payment_id,
+                razorpay_signature: response.razorpay_signature,
+            }),
+        })
+            .then(reply => reply.json())
+            .then(result => {
+                if (result.success) {
+                    window.location.href = data.successUrl;
+                } else {
+                    message.textContent = result.message || 'Payment verification failed.';
+                }
+            })
+            .catch(() => {
+                message.textContent = 'Could not reach the server. Your order page will show the payment once it is confirmed.';
+            });
+    }
+
+    const razorpay = new window.Razorpay({
+        key: data.key,
+        amount: data.amount,
+        currency: 'INR',
+        name: 'FoodHub',
+        description: 'Order #' + data.orderNumber,
+        order_id: data.orderId,
+        prefill: {name: data.name, email: data.email, contact: data.contact},
+        handler: verify,
+        modal: {
+            ondismiss: () => {
+                message.textContent = 'Payment was not completed. Press Pay Now to try again.';
+            },
+        },
+    });
+    razorpay.on('payment.failed', response => {
+        message.textContent = response.error.description || 'Payment failed. Please try again.';
+    });
+
+    document.getElementById('razorpayPay').addEventListener('click', () => razorpay.open());
+    razorpay.open();
+}